@@ -9,6 +9,7 @@ import json
 import argparse
 from datetime import datetime
 from pathlib import Path
+from typing import List
 from src.user_manager import UserManager
 from src.sse_wrapper import CustomSseWrapper
 
@@ -37,10 +38,11 @@ class AsyncTaskMonitor:
                 print("当前没有任务记录")
                 return
             
-            print(f"共找到 {len(all_tasks)} 个任务:\n")
-            
+            # 汇总全部任务信息后一次性输出，避免逐行写终端
+            lines = [f"共找到 {len(all_tasks)} 个任务:\n"]
             for task_id, task in all_tasks.items():
-                self._print_task_info(task_id, task)
+                lines.extend(self._format_task_info(task_id, task))
+            print("\n".join(lines))
                 
         except Exception as e:
             print(f"获取任务状态失败: {e}")
@@ -56,7 +58,7 @@ class AsyncTaskMonitor:
                 print(f"未找到任务 {task_id}")
                 return
             
-            self._print_task_info(task_id, task, detailed=True)
+            print("\n".join(self._format_task_info(task_id, task, detailed=True)))
             
         except Exception as e:
             print(f"获取任务状态失败: {e}")
@@ -76,12 +78,13 @@ class AsyncTaskMonitor:
         try:
             while time.time() - start_time < max_duration:
                 current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                print(f"[{current_time}] 检查任务状态...")
+                # 每轮检查的输出先汇总，再一次性打印
+                lines = [f"[{current_time}] 检查任务状态..."]
                 
                 all_tasks = self.user_manager.get_all_sync_tasks()
                 
                 if not all_tasks:
-                    print("  当前没有任务记录")
+                    lines.append("  当前没有任务记录")
                 else:
                     active_tasks = 0
                     for task_id, task in all_tasks.items():
@@ -89,15 +92,17 @@ class AsyncTaskMonitor:
                         if status in ['pending', 'running']:
                             active_tasks += 1
                             progress = task.progress_message or "无进度信息"
-                            print(f"  {task_id} ({task.username}): {status} - {progress}")
+                            lines.append(f"  {task_id} ({task.username}): {status} - {progress}")
                     
                     if active_tasks == 0:
-                        print("  所有任务已完成")
+                        lines.append("  所有任务已完成")
+                        print("\n".join(lines))
                         break
                     else:
-                        print(f"  活跃任务数: {active_tasks}")
+                        lines.append(f"  活跃任务数: {active_tasks}")
                 
-                print()
+                lines.append("")
+                print("\n".join(lines))
                 time.sleep(interval)
                 
         except KeyboardInterrupt:
@@ -133,38 +138,41 @@ class AsyncTaskMonitor:
             print(f"启动同步任务失败: {e}")
             return None
     
-    def _print_task_info(self, task_id: str, task, detailed: bool = False):
-        """打印任务信息"""
+    def _format_task_info(self, task_id: str, task, detailed: bool = False) -> List[str]:
+        """格式化任务信息，返回待输出的文本行（以空行结尾）"""
         status = task.status.value if hasattr(task.status, 'value') else str(task.status)
         
-        print(f"任务ID: {task_id}")
-        print(f"  用户: {task.username}")
-        print(f"  仓库: {task.repo_name}")
-        print(f"  操作: {task.operation}")
-        print(f"  状态: {status}")
+        lines = [
+            f"任务ID: {task_id}",
+            f"  用户: {task.username}",
+            f"  仓库: {task.repo_name}",
+            f"  操作: {task.operation}",
+            f"  状态: {status}",
+        ]
         
         if task.start_time:
-            print(f"  开始时间: {task.start_time.strftime('%Y-%m-%d %H:%M:%S')}")
+            lines.append(f"  开始时间: {task.start_time.strftime('%Y-%m-%d %H:%M:%S')}")
         
         if task.end_time:
-            print(f"  结束时间: {task.end_time.strftime('%Y-%m-%d %H:%M:%S')}")
+            lines.append(f"  结束时间: {task.end_time.strftime('%Y-%m-%d %H:%M:%S')}")
             if task.start_time:
                 duration = task.end_time - task.start_time
-                print(f"  耗时: {duration.total_seconds():.2f} 秒")
+                lines.append(f"  耗时: {duration.total_seconds():.2f} 秒")
         
         if task.progress_message:
-            print(f"  进度: {task.progress_message}")
+            lines.append(f"  进度: {task.progress_message}")
         
         if task.error_message:
-            print(f"  错误: {task.error_message}")
+            lines.append(f"  错误: {task.error_message}")
         
         if task.local_path:
-            print(f"  本地路径: {task.local_path}")
+            lines.append(f"  本地路径: {task.local_path}")
         
         if detailed and hasattr(task, 'callback') and task.callback:
-            print(f"  回调函数: {task.callback}")
+            lines.append(f"  回调函数: {task.callback}")
         
-        print()
+        lines.append("")
+        return lines
 
 def main():
     """主函数"""
@@ -9,9 +9,10 @@ from pathlib import Path
 import json
 
 # 添加src路径
-sys.path.append(str(Path(__file__).parent / 'src'))
+_SRC_PATH = str(Path(__file__).parent / 'src')
+if _SRC_PATH not in sys.path:
+    sys.path.append(_SRC_PATH)
 
-from src.analyzer import CodeAnalyzer
 from src.config.analyzer_config import AnalyzerConfig
 
 def create_parser():
@@ -132,13 +133,16 @@ def main():
     try:
         # 处理特殊命令
         if args.list_languages:
+            # 按需导入：CodeAnalyzer 会加载 tree-sitter 和全部解析器，--help 等命令无需这部分开销
+            from src.analyzer import CodeAnalyzer
             analyzer = CodeAnalyzer()
             languages = analyzer.list_supported_languages()
-            print("支持的编程语言:")
+            lines = ["支持的编程语言:"]
             for lang in languages:
                 info = analyzer.get_language_info(lang)
                 extensions = ', '.join(info.get('file_extensions', []))
-                print(f"  {lang}: {extensions}")
+                lines.append(f"  {lang}: {extensions}")
+            print("\n".join(lines))
             return 0
         
         if args.create_config:
@@ -189,26 +193,29 @@ def main():
             return 1
         
         # 创建分析器并运行分析
+        from src.analyzer import CodeAnalyzer
         analyzer = CodeAnalyzer(config)
         result = analyzer.analyze()
         
         if result['success']:
-            print("分析完成!")
+            # 汇总分析报告后一次性输出，避免逐行写终端
+            lines = ["分析完成!"]
             
             # 显示统计信息
             stats = result['statistics']
-            print(f"\n统计信息:")
-            print(f"  节点总数: {stats['total_nodes']}")
-            print(f"  关系总数: {stats['total_relationships']}")
+            lines.append(f"\n统计信息:")
+            lines.append(f"  节点总数: {stats['total_nodes']}")
+            lines.append(f"  关系总数: {stats['total_relationships']}")
             
-            print(f"\n节点类型:")
+            lines.append(f"\n节点类型:")
             for node_type, count in stats['node_types'].items():
-                print(f"  {node_type}: {count}")
+                lines.append(f"  {node_type}: {count}")
             
-            print(f"\n输出文件:")
+            lines.append(f"\n输出文件:")
             for format_name, file_path in result['output_files'].items():
-                print(f"  {format_name}: {file_path}")
+                lines.append(f"  {format_name}: {file_path}")
             
+            print("\n".join(lines))
             return 0
         else:
             print(f"分析失败: {result.get('error', '未知错误')}", file=sys.stderr)
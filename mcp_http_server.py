@@ -5,10 +5,10 @@ HTTP MCP Server for Tree-Sitter代码分析器
 基于Starlette和SSE传输
 """
 import asyncio
-import json
+import contextlib
 import logging
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Sequence, Union
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
 import sys
 import uvicorn
 from starlette.applications import Starlette
@@ -18,7 +18,9 @@ from starlette.responses import Response
 from src.sse_wrapper import CustomSseWrapper
 
 # 添加src路径
-sys.path.append(str(Path(__file__).parent / 'src'))
+_SRC_PATH = str(Path(__file__).parent / 'src')
+if _SRC_PATH not in sys.path:
+    sys.path.append(_SRC_PATH)
 
 try:
     from mcp.server import Server
@@ -118,6 +120,12 @@ class TreeSitterMCPServer:
         # 初始化缓存管理器
         self.cache_manager = AnalysisCache()
         
+        # 摘要生成器不持有状态，所有分析请求共用一个实例
+        self.summary_generator = LayeredSummaryGenerator()
+        
+        # 分析在工作线程中执行，同一时间只允许一个分析（及缓存清理）读写缓存索引
+        self._analysis_lock = asyncio.Lock()
+        
         # 初始化路径解析器
         self.path_resolver = PathResolver()
         
@@ -320,6 +328,24 @@ class TreeSitterMCPServer:
     
     async def _analyze_project(self, args: Dict[str, Any]) -> Sequence[TextContent]:
         """分析项目（支持缓存）"""
+        # 解析源码、读写缓存都是阻塞操作，放到工作线程执行，避免阻塞事件循环上的其他请求
+        async with self._analysis_lock:
+            response, analysis = await asyncio.to_thread(self._analyze_project_sync, args)
+            if analysis is not None:
+                # 回到事件循环后一次性发布，其他工具调用不会看到新旧项目数据混杂的状态
+                (self.current_project_path, self.kg_data, self.detailed_index,
+                 self.mcp_tools, self.analyzer) = analysis
+        return response
+    
+    def _analyze_project_sync(self, args: Dict[str, Any]) -> Tuple[Sequence[TextContent], Optional[Tuple]]:
+        """
+        分析项目的同步实现，在工作线程中运行
+        
+        只在局部变量中构建结果，不修改服务器状态。
+        
+        Returns:
+            (响应内容, 分析结果)；分析结果为 (项目路径, 知识图谱, 详细索引, MCP工具, 分析器)，失败时为 None
+        """
         project_path = args.get("project_path", ".")
         language = args.get("language", "csharp")
         compress = args.get("compress", True)
@@ -345,19 +371,16 @@ class TreeSitterMCPServer:
                 cached_data = self.cache_manager.load_project_cache(project_path, language)
                 
                 if cached_data:
-                    # 保存当前项目信息
-                    self.current_project_path = project_path
-                    self.kg_data = cached_data['kg_data']
-                    self.detailed_index = cached_data['detailed_index']
+                    kg_data = cached_data['kg_data']
+                    detailed_index = cached_data['detailed_index']
                     
                     # 初始化MCP工具
-                    self.mcp_tools = MCPCodeTools()
-                    self.mcp_tools.kg_data = self.kg_data
-                    self.mcp_tools.set_detailed_index(self.detailed_index)
+                    mcp_tools = MCPCodeTools()
+                    mcp_tools.kg_data = kg_data
+                    mcp_tools.set_detailed_index(detailed_index)
                     
                     # 生成分层摘要
-                    summary_generator = LayeredSummaryGenerator()
-                    summaries = summary_generator.generate_multilevel_summaries(self.kg_data)
+                    summaries = self.summary_generator.generate_multilevel_summaries(kg_data)
                     
                     # 获取缓存信息
                     cache_info = cached_data['cache_info']
@@ -379,8 +402,8 @@ class TreeSitterMCPServer:
 {navigation}
 
 分析统计
-- 总节点数: {self.kg_data.get('statistics', {}).get('total_nodes', 0)}
-- 总关系数: {self.kg_data.get('statistics', {}).get('total_relationships', 0)}
+- 总节点数: {kg_data.get('statistics', {}).get('total_nodes', 0)}
+- 总关系数: {kg_data.get('statistics', {}).get('total_relationships', 0)}
 - 项目路径: {project_path}
 - 压缩模式: {'启用' if compress else '禁用'}
 
@@ -392,7 +415,8 @@ class TreeSitterMCPServer:
 现在可以使用上述工具进行详细查询了！
 """
                     
-                    return [TextContent(type="text", text=response)]
+                    return ([TextContent(type="text", text=response)],
+                            (project_path, kg_data, detailed_index, mcp_tools, None))
             
             # 需要重新分析
             logger.info(" 项目已改变，重新分析...")
@@ -402,53 +426,43 @@ class TreeSitterMCPServer:
             config.set('input.path', project_path)
             config.set('input.language', language)
             config.set('knowledge_graph.compress_members', compress)
-            config.set('output.formats', ['json', 'llm_prompt'])
+            # 知识图谱直接从分析器的内存结果获取，无需写出再读回输出文件
+            config.set('output.formats', [])
             config.set('logging.level', 'ERROR')
             
-            # 创建临时输出目录
-            import tempfile
-            with tempfile.TemporaryDirectory() as temp_dir:
-                config.set('output.directory', temp_dir)
-                
-                # 执行分析
-                self.analyzer = CodeAnalyzer(config)
-                result = self.analyzer.analyze()
-                
-                if not result['success']:
-                    return [TextContent(type="text", text=f"分析失败: {result.get('error', '未知错误')}")]
-                
-                # 保存当前项目信息
-                self.current_project_path = project_path
-                
-                # 读取生成的数据
-                kg_file = Path(temp_dir) / 'knowledge_graph.json'
-                with open(kg_file, 'r', encoding='utf-8') as f:
-                    self.kg_data = json.load(f)
-                
-                # 生成分层摘要
-                summary_generator = LayeredSummaryGenerator()
-                summaries = summary_generator.generate_multilevel_summaries(self.kg_data)
-                self.detailed_index = summaries.get('detailed_index', {})
-                
-                # 初始化MCP工具
-                self.mcp_tools = MCPCodeTools()
-                self.mcp_tools.kg_data = self.kg_data
-                self.mcp_tools.set_detailed_index(self.detailed_index)
-                
-                # 保存到缓存
-                logger.info(" 保存分析结果到缓存...")
-                self.cache_manager.save_project_cache(
-                    project_path, language, file_extensions, 
-                    self.kg_data, self.detailed_index
-                )
-                
-                # 返回概览信息
-                overview = summaries.get('overview', '项目分析完成')
-                navigation = summaries.get('navigation', '导航索引生成完成')
-                
-                stats = result['statistics']
-                
-                response = f"""项目分析完成！
+            # 执行分析
+            analyzer = CodeAnalyzer(config)
+            result = analyzer.analyze()
+            
+            if not result['success']:
+                return [TextContent(type="text", text=f"分析失败: {result.get('error', '未知错误')}")], None
+            
+            # 获取生成的数据
+            kg_data = analyzer.last_knowledge_graph.to_dict()
+            
+            # 生成分层摘要
+            summaries = self.summary_generator.generate_multilevel_summaries(kg_data)
+            detailed_index = summaries.get('detailed_index', {})
+            
+            # 初始化MCP工具
+            mcp_tools = MCPCodeTools()
+            mcp_tools.kg_data = kg_data
+            mcp_tools.set_detailed_index(detailed_index)
+            
+            # 保存到缓存
+            logger.info(" 保存分析结果到缓存...")
+            self.cache_manager.save_project_cache(
+                project_path, language, file_extensions, 
+                kg_data, detailed_index
+            )
+            
+            # 返回概览信息
+            overview = summaries.get('overview', '项目分析完成')
+            navigation = summaries.get('navigation', '导航索引生成完成')
+            
+            stats = result['statistics']
+            
+            response = f"""项目分析完成！
 
 {overview}
 
@@ -468,11 +482,12 @@ class TreeSitterMCPServer:
 
 现在可以使用上述工具进行详细查询了！
 """
-                
-                return [TextContent(type="text", text=response)]
-        
+            
+            return ([TextContent(type="text", text=response)],
+                    (project_path, kg_data, detailed_index, mcp_tools, analyzer))
+    
         except Exception as e:
-            return [TextContent(type="text", text=f"分析项目时发生错误: {str(e)}")]
+            return [TextContent(type="text", text=f"分析项目时发生错误: {str(e)}")], None
     
     async def _get_project_overview(self, args: Dict[str, Any]) -> Sequence[TextContent]:
         """获取项目概览"""
@@ -887,7 +902,7 @@ class TreeSitterMCPServer:
         
         type_filter = args.get("type_filter", "").lower()
         
-        response = "项目中的所有类型\n\n"
+        response_parts = ["项目中的所有类型\n\n"]
         
         # 按类型分组
         types_by_category = {}
@@ -905,29 +920,31 @@ class TreeSitterMCPServer:
                 
                 types_by_category[node_type].append(node)
         
+        # 类型数量随项目规模增长，各片段收集后一次拼接，避免反复拼接长字符串
         for type_name, types in types_by_category.items():
-            response += f"{type_name.capitalize()}s ({len(types)}个)\n\n"
+            response_parts.append(f"{type_name.capitalize()}s ({len(types)}个)\n\n")
             
             for type_node in types:
-                response += f"- {type_node['name']}"
+                response_parts.append(f"- {type_node['name']}")
                 
                 # 添加修饰符信息
                 modifiers = type_node.get('metadata', {}).get('modifiers', [])
                 if modifiers:
-                    response += f" ({', '.join(modifiers)})"
+                    response_parts.append(f" ({', '.join(modifiers)})")
                 
                 # 添加继承信息
                 base_types = type_node.get('metadata', {}).get('base_types', [])
                 if base_types:
-                    response += f" 继承自: {', '.join(base_types)}"
+                    response_parts.append(f" 继承自: {', '.join(base_types)}")
                 
-                response += "\n"
+                response_parts.append("\n")
             
-            response += "\n"
+            response_parts.append("\n")
         
         if not types_by_category:
-            response += "未找到匹配的类型"
+            response_parts.append("未找到匹配的类型")
         
+        response = "".join(response_parts)
         return [TextContent(type="text", text=response)]
     
     async def _clear_cache(self, args: Dict[str, Any]) -> Sequence[TextContent]:
@@ -936,14 +953,16 @@ class TreeSitterMCPServer:
         language = args.get("language", "csharp")
         
         try:
-            if project_path:
-                # 清除特定项目缓存
-                self.cache_manager.clear_cache(project_path, language)
-                response = f"已清除项目缓存: {project_path}"
-            else:
-                # 清除所有缓存
-                self.cache_manager.clear_cache()
-                response = "已清除所有缓存"
+            # 与正在进行的分析互斥，避免同时改写缓存索引
+            async with self._analysis_lock:
+                if project_path:
+                    # 清除特定项目缓存
+                    self.cache_manager.clear_cache(project_path, language)
+                    response = f"已清除项目缓存: {project_path}"
+                else:
+                    # 清除所有缓存
+                    self.cache_manager.clear_cache()
+                    response = "已清除所有缓存"
             
             return [TextContent(type="text", text=response)]
             
@@ -1082,7 +1101,13 @@ def main():
             Mount("/messages", app=sse.handle_post_message),
         ]
         
-        app = Starlette(routes=routes)
+        @contextlib.asynccontextmanager
+        async def lifespan(app):
+            yield
+            # 关闭时写入尚未落盘的用户数据
+            await sse.aclose()
+        
+        app = Starlette(routes=routes, lifespan=lifespan)
         
         print("🚀 HTTP MCP服务器启动中...")
         print(f"📍 访问端点: http://{host}:{port}/mcp")
@@ -8,7 +8,9 @@ from typing import List, Optional, Dict, Any
 import logging
 
 # 添加模块路径
-sys.path.append(str(Path(__file__).parent))
+_SRC_PATH = str(Path(__file__).parent)
+if _SRC_PATH not in sys.path:
+    sys.path.append(_SRC_PATH)
 
 from core.base_parser import CodeNode
 from languages import get_parser, get_supported_languages
@@ -28,6 +30,9 @@ class CodeAnalyzer:
         self.summary_generator = LayeredSummaryGenerator(self.config)
         self.vector_indexer = VectorIndexer(self.config)
         
+        # 最近一次 analyze 生成的知识图谱，供调用方直接复用，无需读取输出文件
+        self.last_knowledge_graph = None
+        
         # 设置日志
         self.config.setup_logging()
         
@@ -38,8 +43,27 @@ class CodeAnalyzer:
                 self.logger.error(error)
             raise ValueError(f"配置验证失败: {config_errors}")
     
-    def analyze(self, input_path: Optional[str] = None, language: Optional[str] = None) -> Dict[str, Any]:
-        """分析代码并生成知识图谱"""
+    def parse(self, input_path: Optional[str] = None, language: Optional[str] = None) -> List[CodeNode]:
+        """
+        解析代码，返回过滤后的代码节点
+        
+        解析结果不受知识图谱配置（如 compress_members）影响，可传给 analyze 复用，
+        以不同配置多次生成知识图谱时避免重复解析。
+        """
+        input_path = input_path or self.config.get('input.path')
+        language = language or self.config.get('input.language')
+        
+        # 获取解析器
+        parser_class = get_parser(language)
+        if not parser_class:
+            raise ValueError(f"不支持的语言: {language}，支持的语言: {get_supported_languages()}")
+        
+        parser = parser_class()
+        return self._parse_input(parser, input_path)
+    
+    def analyze(self, input_path: Optional[str] = None, language: Optional[str] = None,
+                code_nodes: Optional[List[CodeNode]] = None) -> Dict[str, Any]:
+        """分析代码并生成知识图谱，提供 code_nodes 时跳过解析直接使用"""
         # 使用提供的参数或配置文件中的参数
         input_path = input_path or self.config.get('input.path')
         language = language or self.config.get('input.language')
@@ -47,15 +71,9 @@ class CodeAnalyzer:
         self.logger.info(f"开始分析代码: {input_path}, 语言: {language}")
         
         try:
-            # 获取解析器
-            parser_class = get_parser(language)
-            if not parser_class:
-                raise ValueError(f"不支持的语言: {language}，支持的语言: {get_supported_languages()}")
-            
-            parser = parser_class()
-            
             # 解析代码
-            code_nodes = self._parse_input(parser, input_path)
+            if code_nodes is None:
+                code_nodes = self.parse(input_path, language)
             if not code_nodes:
                 self.logger.warning("没有找到可解析的代码文件")
                 return {'success': False, 'message': '没有找到可解析的代码文件'}
@@ -64,6 +82,7 @@ class CodeAnalyzer:
             
             # 生成知识图谱
             knowledge_graph = self.kg_generator.generate_from_code_nodes(code_nodes)
+            self.last_knowledge_graph = knowledge_graph
             
             # 输出结果  
             output_files = self._save_outputs(knowledge_graph)
@@ -175,11 +194,14 @@ class CodeAnalyzer:
     
     def _save_outputs(self, knowledge_graph) -> Dict[str, str]:
         """保存输出文件"""
-        output_dir = Path(self.config.get('output.directory', './output'))
-        output_dir.mkdir(parents=True, exist_ok=True)
-        
         output_files = {}
         formats = self.config.get('output.formats', ['json'])
+        # 不输出任何文件时也不创建输出目录
+        if not formats:
+            return output_files
+        
+        output_dir = Path(self.config.get('output.directory', './output'))
+        output_dir.mkdir(parents=True, exist_ok=True)
         
         # JSON格式
         if 'json' in formats:
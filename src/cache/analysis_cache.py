@@ -3,13 +3,17 @@
 实现类似Git的文件哈希机制，智能判断项目是否需要重新分析
 """
 import hashlib
-import json
 import os
 import time
 from pathlib import Path
 from typing import Dict, Any, List, Optional, Set
 import logging
 
+from .. import json_io
+
+# 计算文件哈希时每次读取的字节数，多数源码文件一次即可读完
+_HASH_CHUNK_SIZE = 64 * 1024
+
 class AnalysisCache:
     """分析结果缓存管理器"""
     
@@ -60,28 +64,46 @@ class AnalysisCache:
             文件的MD5哈希值
         """
         hash_md5 = hashlib.md5()
+        # 读入同一块缓冲区再按实际长度更新哈希，不为每个分块分配新的 bytes 对象
+        buffer = bytearray(_HASH_CHUNK_SIZE)
+        view = memoryview(buffer)
         try:
-            with open(file_path, "rb") as f:
-                for chunk in iter(lambda: f.read(4096), b""):
-                    hash_md5.update(chunk)
+            with open(file_path, "rb", buffering=0) as f:
+                while True:
+                    size = f.readinto(buffer)
+                    if not size:
+                        break
+                    hash_md5.update(view[:size])
             return hash_md5.hexdigest()
         except Exception as e:
             self.logger.warning(f"计算文件哈希失败 {file_path}: {e}")
             return ""
     
-    def scan_project_files(self, project_path: str, file_extensions: List[str]) -> Dict[str, str]:
+    def scan_project_files(self, project_path: str, file_extensions: List[str],
+                           previous: Optional[Dict[str, Any]] = None,
+                           file_stats: Optional[Dict[str, List[int]]] = None) -> Dict[str, str]:
         """
         扫描项目中的所有相关文件并计算哈希值
         
+        与 Git 的索引类似，修改时间和大小都与上次记录一致的文件直接沿用上次的哈希，
+        只有发生变化的文件才重新读取计算。修改时间不早于上次缓存时间的文件
+        可能在扫描期间或之后的同一时刻被改过（racy clean），仍然重新计算。
+        
         Args:
             project_path: 项目路径
             file_extensions: 文件扩展名列表
+            previous: 上次的项目缓存记录（含 file_hashes 和 file_stats）
+            file_stats: 如果提供，写入每个文件的 [修改时间(ns), 大小]
             
         Returns:
             文件路径到哈希值的映射
         """
         file_hashes = {}
         project_path = Path(project_path)
+        previous = previous or {}
+        old_hashes = previous.get('file_hashes', {})
+        old_stats = previous.get('file_stats', {})
+        racy_since_ns = previous.get('cached_at', 0) * 1_000_000_000
         
         # 递归扫描所有相关文件
         for ext in file_extensions:
@@ -89,9 +111,17 @@ class AnalysisCache:
                 if file_path.is_file():
                     # 使用相对路径作为键，确保跨机器兼容性
                     relative_path = str(file_path.relative_to(project_path))
-                    file_hash = self.calculate_file_hash(str(file_path))
+                    stat = file_path.stat()
+                    stat_key = [stat.st_mtime_ns, stat.st_size]
+                    
+                    file_hash = old_hashes.get(relative_path)
+                    if (not file_hash or old_stats.get(relative_path) != stat_key
+                            or stat.st_mtime_ns >= racy_since_ns):
+                        file_hash = self.calculate_file_hash(str(file_path))
                     if file_hash:  # 只添加成功计算哈希的文件
                         file_hashes[relative_path] = file_hash
+                        if file_stats is not None:
+                            file_stats[relative_path] = stat_key
         
         return file_hashes
     
@@ -116,8 +146,7 @@ class AnalysisCache:
         
         try:
             # 读取缓存索引
-            with open(self.index_file, 'r', encoding='utf-8') as f:
-                cache_index = json.load(f)
+            cache_index = json_io.load_file(self.index_file)
             
             # 检查项目是否在缓存中
             if cache_key not in cache_index:
@@ -139,8 +168,8 @@ class AnalysisCache:
             # 获取上次的文件哈希
             old_hashes = project_cache.get('file_hashes', {})
             
-            # 计算当前文件哈希
-            current_hashes = self.scan_project_files(project_path, file_extensions)
+            # 计算当前文件哈希，未变化的文件沿用上次的哈希
+            current_hashes = self.scan_project_files(project_path, file_extensions, project_cache)
             
             # 比较文件数量
             if len(old_hashes) != len(current_hashes):
@@ -182,24 +211,26 @@ class AnalysisCache:
         cache_key = self.get_project_cache_key(project_path, language)
         
         try:
-            # 计算当前项目文件哈希
-            file_hashes = self.scan_project_files(project_path, file_extensions)
-            
             # 读取或创建缓存索引
             cache_index = {}
             if self.index_file.exists():
-                with open(self.index_file, 'r', encoding='utf-8') as f:
-                    cache_index = json.load(f)
+                cache_index = json_io.load_file(self.index_file)
+            
+            # 缓存时间取扫描开始前的时刻，扫描期间及之后被修改的文件下次都会重新哈希
+            cached_at = int(time.time())
+            
+            # 计算当前项目文件哈希，同时记录修改时间和大小供下次快速比对
+            file_stats = {}
+            file_hashes = self.scan_project_files(project_path, file_extensions,
+                                                  cache_index.get(cache_key), file_stats)
             
             # 保存知识图谱和详细索引到单独的文件
             kg_file = self.cache_dir / f"{cache_key}_kg.json"
             index_file = self.cache_dir / f"{cache_key}_index.json"
             
-            with open(kg_file, 'w', encoding='utf-8') as f:
-                json.dump(kg_data, f, ensure_ascii=False, indent=2)
+            json_io.dump_file(kg_file, kg_data)
             
-            with open(index_file, 'w', encoding='utf-8') as f:
-                json.dump(detailed_index, f, ensure_ascii=False, indent=2)
+            json_io.dump_file(index_file, detailed_index)
             
             # 更新缓存索引
             cache_index[cache_key] = {
@@ -207,15 +238,15 @@ class AnalysisCache:
                 'language': language,
                 'file_extensions': file_extensions,
                 'file_hashes': file_hashes,
-                'cached_at': int(time.time()),
+                'file_stats': file_stats,
+                'cached_at': cached_at,
                 'kg_file': str(kg_file),
                 'index_file': str(index_file),
                 'file_count': len(file_hashes)
             }
             
             # 保存缓存索引
-            with open(self.index_file, 'w', encoding='utf-8') as f:
-                json.dump(cache_index, f, ensure_ascii=False, indent=2)
+            json_io.dump_file(self.index_file, cache_index)
             
             self.logger.info(f"项目缓存已保存: {cache_key}")
             
@@ -240,8 +271,7 @@ class AnalysisCache:
             if not self.index_file.exists():
                 return None
             
-            with open(self.index_file, 'r', encoding='utf-8') as f:
-                cache_index = json.load(f)
+            cache_index = json_io.load_file(self.index_file)
             
             if cache_key not in cache_index:
                 return None
@@ -255,16 +285,14 @@ class AnalysisCache:
             if not kg_file.exists() or not index_file.exists():
                 self.logger.warning(f"缓存文件不存在，删除缓存记录: {cache_key}")
                 del cache_index[cache_key]
-                with open(self.index_file, 'w', encoding='utf-8') as f:
-                    json.dump(cache_index, f, ensure_ascii=False, indent=2)
+                json_io.dump_file(self.index_file, cache_index)
                 return None
             
             # 加载缓存数据
-            with open(kg_file, 'r', encoding='utf-8') as f:
-                kg_data = json.load(f)
+            kg_data = json_io.load_file(kg_file)
+            json_io.intern_kg(kg_data)
             
-            with open(index_file, 'r', encoding='utf-8') as f:
-                detailed_index = json.load(f)
+            detailed_index = json_io.load_file(index_file)
             
             self.logger.info(f"成功加载项目缓存: {cache_key}")
             return {
@@ -298,8 +326,7 @@ class AnalysisCache:
                 cache_key = self.get_project_cache_key(project_path, language)
                 
                 if self.index_file.exists():
-                    with open(self.index_file, 'r', encoding='utf-8') as f:
-                        cache_index = json.load(f)
+                    cache_index = json_io.load_file(self.index_file)
                     
                     if cache_key in cache_index:
                         project_cache = cache_index[cache_key]
@@ -314,8 +341,7 @@ class AnalysisCache:
                         # 从索引中删除
                         del cache_index[cache_key]
                         
-                        with open(self.index_file, 'w', encoding='utf-8') as f:
-                            json.dump(cache_index, f, ensure_ascii=False, indent=2)
+                        json_io.dump_file(self.index_file, cache_index)
                         
                         self.logger.info(f"已清除项目缓存: {project_path}")
                     else:
@@ -335,8 +361,7 @@ class AnalysisCache:
             if not self.index_file.exists():
                 return {'cached_projects': 0, 'total_size': 0}
             
-            with open(self.index_file, 'r', encoding='utf-8') as f:
-                cache_index = json.load(f)
+            cache_index = json_io.load_file(self.index_file)
             
             total_size = 0
             for cache_key, project_cache in cache_index.items():
@@ -169,12 +169,13 @@ class AnalyzerConfig:
         if not input_path.exists():
             errors.append(f"输入路径不存在: {input_path}")
         
-        # 检查输出目录
-        output_dir = Path(self.get('output.directory', './output'))
-        try:
-            output_dir.mkdir(parents=True, exist_ok=True)
-        except Exception as e:
-            errors.append(f"无法创建输出目录 {output_dir}: {e}")
+        # 检查输出目录（不输出任何文件时无需创建）
+        if self.get('output.formats', ['json']):
+            output_dir = Path(self.get('output.directory', './output'))
+            try:
+                output_dir.mkdir(parents=True, exist_ok=True)
+            except Exception as e:
+                errors.append(f"无法创建输出目录 {output_dir}: {e}")
         
         # 检查语言支持
         language = self.get('input.language', 'csharp')
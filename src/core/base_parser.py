@@ -11,6 +11,9 @@ import logging
 class CodeNode:
     """代码节点类，表示代码结构中的一个元素"""
     
+    # 大型项目解析会产生大量节点，使用 __slots__ 省去每个实例的 __dict__
+    __slots__ = ('node_type', 'name', 'start_line', 'end_line', 'parent', 'children', 'metadata')
+    
     def __init__(self, 
                  node_type: str, 
                  name: str, 
@@ -113,14 +116,18 @@ class BaseParser(ABC):
             self.logger.error(f"目录不存在: {dir_path}")
             return results
         
+        # 逐文件日志降为 DEBUG，大目录解析时不再为每个文件格式化和输出日志
+        log_each_file = self.logger.isEnabledFor(logging.DEBUG)
         for ext in file_extensions:
             for file_path in dir_path.rglob(f"*.{ext}"):
                 if file_path.is_file():
-                    self.logger.info(f"正在解析: {file_path}")
+                    if log_each_file:
+                        self.logger.debug(f"正在解析: {file_path}")
                     result = self.parse_file(str(file_path))
                     if result:
                         results.append(result)
         
+        self.logger.info(f"目录解析完成: {dir_path}，共 {len(results)} 个文件")
         return results
     
     def _get_node_text(self, node, source_code: bytes) -> str:
@@ -0,0 +1,183 @@
+"""
+JSON 读写工具 - 优先使用 orjson 加速序列化，未安装时回退到标准库 json
+"""
+
+import json
+import os
+import sys
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, Tuple, Union
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    orjson = None
+    ORJSON_AVAILABLE = False
+
+try:
+    import ijson
+    IJSON_AVAILABLE = True
+except ImportError:
+    ijson = None
+    IJSON_AVAILABLE = False
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """
+    解析 JSON 数据
+
+    Args:
+        data: JSON 文本（bytes 或 str）
+
+    Returns:
+        Any: 解析后的对象
+    """
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(obj: Any, indent: bool = True) -> bytes:
+    """
+    序列化为 UTF-8 编码的 JSON 字节串
+
+    Args:
+        obj: 要序列化的对象
+        indent: 是否使用两个空格缩进
+
+    Returns:
+        bytes: JSON 字节串
+    """
+    if ORJSON_AVAILABLE:
+        option = orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, option=option)
+    return json.dumps(obj, ensure_ascii=False, indent=2 if indent else None).encode('utf-8')
+
+
+def load_file(path: Union[str, Path]) -> Any:
+    """
+    读取并解析 JSON 文件
+
+    Args:
+        path: 文件路径
+
+    Returns:
+        Any: 解析后的对象
+    """
+    with open(path, 'rb') as f:
+        return loads(f.read())
+
+
+def dump_file(path: Union[str, Path], obj: Any, indent: bool = True, fsync: bool = False) -> None:
+    """
+    将对象序列化写入 JSON 文件
+
+    Args:
+        path: 文件路径
+        obj: 要序列化的对象
+        indent: 是否使用两个空格缩进
+        fsync: 关闭前是否把数据刷到磁盘
+    """
+    write_file(path, dumps(obj, indent), fsync)
+
+
+def write_file(path: Union[str, Path], payload: bytes, fsync: bool = False) -> None:
+    """
+    将已序列化的 JSON 字节串写入文件
+
+    Args:
+        path: 文件路径
+        payload: JSON 字节串
+        fsync: 关闭前是否把数据刷到磁盘
+    """
+    with open(path, 'wb') as f:
+        f.write(payload)
+        if fsync:
+            f.flush()
+            os.fsync(f.fileno())
+
+
+def intern_fields(records: Iterable[Dict[str, Any]], fields: Tuple[str, ...]) -> None:
+    """
+    原地驻留记录中指定字段的字符串值
+
+    JSON 解析会为每次出现的相同字符串创建新对象，驻留后重复值共享同一对象，
+    减少内存占用，后续以这些值作字典键查找或比较时也更快。
+
+    Args:
+        records: 字典记录的可迭代对象
+        fields: 需要驻留的字段名
+    """
+    intern = sys.intern
+    for record in records:
+        for name in fields:
+            value = record.get(name)
+            if type(value) is str:
+                record[name] = intern(value)
+
+
+def intern_kg(kg_data: Dict[str, Any]) -> None:
+    """
+    原地驻留知识图谱数据中节点和关系的常用字段
+
+    节点ID和类型在关系中大量重复出现，驻留后共享同一字符串对象。
+
+    Args:
+        kg_data: 知识图谱字典（含 nodes 和 relationships）
+    """
+    intern_fields(kg_data.get('nodes', []), ('id', 'type', 'name'))
+    intern_fields(kg_data.get('relationships', []), ('from', 'to', 'type'))
+
+
+def iter_object_items(path: Union[str, Path]) -> Iterator[Tuple[str, Any]]:
+    """
+    逐项读取 JSON 文件顶层对象的键值对
+
+    安装了 ijson 时流式解析，每次只构造一个值；否则整体解析后逐项返回。
+    顶层不是对象时抛出 ValueError（ijson 对非对象顶层会静默地不返回任何项）。
+
+    Args:
+        path: 文件路径
+
+    Returns:
+        Iterator[Tuple[str, Any]]: 顶层对象的 (键, 值) 迭代器
+    """
+    if IJSON_AVAILABLE:
+        with open(path, 'rb') as f:
+            first = f.read(1)
+            while first.isspace():
+                first = f.read(1)
+            if first != b'{':
+                raise ValueError(f"JSON 顶层不是对象: {path}")
+            f.seek(0)
+            yield from ijson.kvitems(f, '', use_float=True)
+    else:
+        data = load_file(path)
+        if not isinstance(data, dict):
+            raise ValueError(f"JSON 顶层不是对象: {path}")
+        yield from data.items()
+
+
+def dump_object_items(path: Union[str, Path], items: Iterable[Tuple[str, Any]]) -> None:
+    """
+    逐项写出 JSON 对象，每个键值对占一行
+
+    不在内存中构造完整的对象和序列化结果，适合导出大量记录。
+
+    Args:
+        path: 文件路径
+        items: 顶层对象的 (键, 值) 可迭代对象
+    """
+    with open(path, 'wb') as f:
+        f.write(b'{')
+        separator = b'\n  '
+        for key, value in items:
+            f.write(separator)
+            f.write(dumps(key, indent=False))
+            f.write(b': ')
+            f.write(dumps(value, indent=False))
+            separator = b',\n  '
+        f.write(b'\n}\n')
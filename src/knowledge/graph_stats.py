@@ -0,0 +1,24 @@
+"""
+知识图谱统计工具
+供摘要生成器和MCP工具共用的图谱计数函数
+"""
+from typing import Dict, Any
+
+
+def count_by_type(kg_data: Dict[str, Any], key: str, type_name: str) -> int:
+    """
+    按类型统计节点或关系数量，优先使用图谱自带的统计信息
+
+    Args:
+        kg_data: 知识图谱数据
+        key: 'nodes' 统计节点，'relationships' 统计关系
+        type_name: 节点或关系类型
+
+    Returns:
+        int: 该类型的数量
+    """
+    stats_key = 'node_types' if key == 'nodes' else 'relationship_types'
+    counts = kg_data.get('statistics', {}).get(stats_key)
+    if counts is not None:
+        return counts.get(type_name, 0)
+    return sum(1 for item in kg_data.get(key, []) if item['type'] == type_name)
@@ -2,15 +2,29 @@
 知识图谱生成器
 将解析后的代码结构转换为适合LLM理解的知识图谱
 """
-import json
 from typing import Dict, List, Any, Optional, Set, Tuple
+from collections import Counter, defaultdict
+from itertools import islice
 from pathlib import Path
 import sys
 import logging
 
 # 添加核心模块路径
-sys.path.append(str(Path(__file__).parent.parent))
+_SRC_PATH = str(Path(__file__).parent.parent)
+if _SRC_PATH not in sys.path:
+    sys.path.append(_SRC_PATH)
 from core.base_parser import CodeNode
+import json_io
+
+# 方法名关键字到操作类型的映射，按顺序匹配，压缩成员时每个方法都会用到
+_OPERATION_KEYWORDS = (
+    ('查询操作', ('get', 'find', 'search', 'query', 'retrieve')),
+    ('创建操作', ('create', 'add', 'insert', 'new')),
+    ('更新操作', ('update', 'modify', 'change', 'edit', 'set')),
+    ('删除操作', ('delete', 'remove', 'clear')),
+    ('验证操作', ('validate', 'check', 'verify', 'is', 'can', 'has')),
+    ('计算操作', ('calculate', 'compute', 'process')),
+)
 
 class KnowledgeGraph:
     """知识图谱类"""
@@ -18,19 +32,66 @@ class KnowledgeGraph:
     def __init__(self):
         self.nodes = {}            # 节点信息
         self.relationships = []    # 关系信息
+        self.nodes_by_type: Dict[str, List[str]] = defaultdict(list)  # 按类型分组的节点ID
+        self.nodes_by_name: Dict[str, List[str]] = defaultdict(list)  # 按名称分组的节点ID
+        self._statistics: Optional[Dict[str, Any]] = None  # 统计信息缓存，图谱变更时失效
+        self._fuzzy_type_matches: Dict[str, Optional[str]] = {}  # 类型名模糊匹配结果缓存，添加节点时失效
         self.logger = logging.getLogger(self.__class__.__name__)
     
     def add_node(self, node_id: str, node_type: str, name: str, metadata: Dict[str, Any] = None):
         """添加节点"""
+        self._statistics = None
+        if self._fuzzy_type_matches:
+            self._fuzzy_type_matches = {}
+        existing = self.nodes.get(node_id)
+        if existing is None:
+            self.nodes_by_type[node_type].append(node_id)
+            self.nodes_by_name[name].append(node_id)
+        elif existing['type'] != node_type:
+            self.nodes_by_type[existing['type']].remove(node_id)
+            self.nodes_by_type[node_type].append(node_id)
+        
         self.nodes[node_id] = {
             'id': node_id,
             'type': node_type,
             'name': name,
             'metadata': metadata or {}
         }
+        
+        if existing is not None and existing['name'] != name:
+            self._reindex_name(existing['name'], node_id, name)
+    
+    def _reindex_name(self, old_name: str, node_id: str, name: str):
+        """已有节点改名时更新名称索引，新名称下的节点ID保持与 nodes 相同的顺序"""
+        node_ids = self.nodes_by_name[old_name]
+        node_ids.remove(node_id)
+        if not node_ids:
+            del self.nodes_by_name[old_name]
+        # 改名很少发生，直接按 nodes 顺序重建新名称的列表
+        self.nodes_by_name[name] = [other_id for other_id, node_info in self.nodes.items()
+                                    if node_info['name'] == name]
+    
+    def find_node_by_name(self, name: str) -> Optional[str]:
+        """根据名称查找节点ID：先按名称精确匹配，再在类型节点中按名称包含关系模糊匹配"""
+        node_ids = self.nodes_by_name.get(name)
+        if node_ids:
+            return node_ids[0]
+        
+        # int、string 等外部类型会反复查询，模糊匹配结果缓存到下一次添加节点
+        if name in self._fuzzy_type_matches:
+            return self._fuzzy_type_matches[name]
+        
+        result = None
+        for node_id, node_info in self.nodes.items():
+            if name in node_info['name'] and node_info['type'] in ['class', 'interface', 'struct', 'enum']:
+                result = node_id
+                break
+        self._fuzzy_type_matches[name] = result
+        return result
     
     def add_relationship(self, from_id: str, to_id: str, relationship_type: str, metadata: Dict[str, Any] = None):
         """添加关系"""
+        self._statistics = None
         self.relationships.append({
             'from': from_id,
             'to': to_id,
@@ -47,23 +108,28 @@ class KnowledgeGraph:
         }
     
     def get_statistics(self) -> Dict[str, Any]:
-        """获取图谱统计信息"""
-        node_types = {}
-        relationship_types = {}
-        
-        for node in self.nodes.values():
-            node_type = node['type']
-            node_types[node_type] = node_types.get(node_type, 0) + 1
-        
-        for rel in self.relationships:
-            rel_type = rel['type']
-            relationship_types[rel_type] = relationship_types.get(rel_type, 0) + 1
+        """
+        获取图谱统计信息，图谱生成后不再变化，结果缓存到下一次添加节点或关系
+        
+        每次返回缓存的副本，调用方修改返回值不会影响缓存。
+        """
+        statistics = self._statistics
+        if statistics is None:
+            node_types = {node_type: len(node_ids)
+                          for node_type, node_ids in self.nodes_by_type.items() if node_ids}
+            relationship_types = dict(Counter(rel['type'] for rel in self.relationships))
+            
+            statistics = self._statistics = {
+                'total_nodes': len(self.nodes),
+                'total_relationships': len(self.relationships),
+                'node_types': node_types,
+                'relationship_types': relationship_types
+            }
         
         return {
-            'total_nodes': len(self.nodes),
-            'total_relationships': len(self.relationships),
-            'node_types': node_types,
-            'relationship_types': relationship_types
+            **statistics,
+            'node_types': dict(statistics['node_types']),
+            'relationship_types': dict(statistics['relationship_types'])
         }
 
 class KnowledgeGraphGenerator:
@@ -262,23 +328,9 @@ class KnowledgeGraphGenerator:
         modifiers = method_node.metadata.get('modifiers', [])
         
         # 根据方法名推断操作类型
-        if any(prefix in method_name for prefix in ['get', 'find', 'search', 'query', 'retrieve']):
-            operations.append('查询操作')
-        
-        if any(prefix in method_name for prefix in ['create', 'add', 'insert', 'new']):
-            operations.append('创建操作')
-        
-        if any(prefix in method_name for prefix in ['update', 'modify', 'change', 'edit', 'set']):
-            operations.append('更新操作')
-        
-        if any(prefix in method_name for prefix in ['delete', 'remove', 'clear']):
-            operations.append('删除操作')
-        
-        if any(prefix in method_name for prefix in ['validate', 'check', 'verify', 'is', 'can', 'has']):
-            operations.append('验证操作')
-        
-        if any(prefix in method_name for prefix in ['calculate', 'compute', 'process']):
-            operations.append('计算操作')
+        for operation, keywords in _OPERATION_KEYWORDS:
+            if any(keyword in method_name for keyword in keywords):
+                operations.append(operation)
         
         # 根据返回类型推断
         if return_type != 'void' and not operations:
@@ -480,23 +532,12 @@ class KnowledgeGraphGenerator:
     
     def _find_node_by_name(self, kg: KnowledgeGraph, name: str) -> Optional[str]:
         """根据名称查找节点ID"""
-        # 精确匹配
-        for node_id, node_info in kg.nodes.items():
-            if node_info['name'] == name:
-                return node_id
-        
-        # 模糊匹配（节点名称包含搜索名称）
-        for node_id, node_info in kg.nodes.items():
-            if name in node_info['name'] and node_info['type'] in ['class', 'interface', 'struct', 'enum']:
-                return node_id
-        
-        return None
+        return kg.find_node_by_name(name)
     
     def save_to_json(self, kg: KnowledgeGraph, output_path: str):
         """保存知识图谱为JSON文件"""
         try:
-            with open(output_path, 'w', encoding='utf-8') as f:
-                json.dump(kg.to_dict(), f, ensure_ascii=False, indent=2)
+            json_io.dump_file(output_path, kg.to_dict())
             self.logger.info(f"知识图谱已保存到: {output_path}")
         except Exception as e:
             self.logger.error(f"保存知识图谱失败: {e}")
@@ -517,10 +558,10 @@ class KnowledgeGraphGenerator:
         
         # 主要类型和其成员
         prompt_parts.append("\n### 主要类型及成员:")
-        main_types = [node for node in kg.nodes.values() 
-                     if node['type'] in ['class', 'interface', 'struct', 'enum']]
+        main_types = (node for node in kg.nodes.values()
+                      if node['type'] in ('class', 'interface', 'struct', 'enum'))
         
-        for node in main_types[:20]:  # 限制显示数量
+        for node in islice(main_types, 20):  # 限制显示数量，取满即停止扫描
             prompt_parts.append(f"\n**{node['type'].capitalize()}: {node['name']}**")
             
             # 继承关系
@@ -573,18 +614,17 @@ class KnowledgeGraphGenerator:
         prompt_parts.append("\n### 架构特点:")
         
         # 命名空间分布
-        namespaces = [node for node in kg.nodes.values() if node['type'] == 'namespace']
-        if namespaces:
-            ns_names = list(set([ns['name'] for ns in namespaces]))
+        ns_names = list({kg.nodes[node_id]['name'] for node_id in kg.nodes_by_type.get('namespace', ())})
+        if ns_names:
             prompt_parts.append(f"- 命名空间: {', '.join(ns_names[:5])}")
         
         # 设计模式推断
-        interface_count = len([n for n in kg.nodes.values() if n['type'] == 'interface'])
+        interface_count = stats['node_types'].get('interface', 0)
         if interface_count > 0:
             prompt_parts.append(f"- 使用接口设计，共 {interface_count} 个接口")
         
         # 继承关系
-        inheritance_count = len([r for r in kg.relationships if r['type'] == 'inherits_from'])
+        inheritance_count = stats['relationship_types'].get('inherits_from', 0)
         if inheritance_count > 0:
             prompt_parts.append(f"- 存在继承关系，共 {inheritance_count} 个继承连接")
         
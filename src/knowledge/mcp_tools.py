@@ -2,11 +2,19 @@
 MCP工具接口
 为LLM提供按需查询详细代码信息的工具
 """
-import json
+from itertools import islice
 from typing import Dict, List, Any, Optional
 from pathlib import Path
+import sys
 import logging
 
+# 添加源码根目录路径
+_SRC_PATH = str(Path(__file__).parent.parent)
+if _SRC_PATH not in sys.path:
+    sys.path.append(_SRC_PATH)
+import json_io
+from .graph_stats import count_by_type
+
 class MCPCodeTools:
     """MCP代码查询工具集"""
     
@@ -14,6 +22,14 @@ class MCPCodeTools:
         self.logger = logging.getLogger(self.__class__.__name__)
         self.kg_data = None
         self.detailed_index = detailed_index or {}
+        # 节点ID -> 节点 的索引及出边/入边邻接表，按 kg_data 对象懒构建；kg_data 被替换后自动重建
+        self._node_index: Dict[str, Dict[str, Any]] = {}
+        self._node_names: Dict[str, str] = {}
+        self._outgoing: Dict[str, List[Dict[str, Any]]] = {}
+        self._incoming: Dict[str, List[Dict[str, Any]]] = {}
+        self._index_source = None
+        # 全部类型列表缓存：(生成时的 detailed_index, 类型列表)
+        self._all_types_cache = None
         
         if kg_file_path:
             self.load_knowledge_graph(kg_file_path)
@@ -21,8 +37,9 @@ class MCPCodeTools:
     def load_knowledge_graph(self, kg_file_path: str):
         """加载知识图谱数据"""
         try:
-            with open(kg_file_path, 'r', encoding='utf-8') as f:
-                self.kg_data = json.load(f)
+            kg_data = json_io.load_file(kg_file_path)
+            json_io.intern_kg(kg_data)
+            self.kg_data = kg_data
             self.logger.info(f"已加载知识图谱: {kg_file_path}")
         except Exception as e:
             self.logger.error(f"加载知识图谱失败: {e}")
@@ -78,17 +95,26 @@ class MCPCodeTools:
         Returns:
             类型的详细信息，包含所有成员
         """
-        # 如果没有提供类型名称，返回所有类型列表
+        # 如果没有提供类型名称，返回所有类型列表（按 detailed_index 缓存，替换索引后重新生成）
         if type_name is None:
-            all_types = {}
-            for name, type_info in self.detailed_index.get('types', {}).items():
-                all_types[name] = {
-                    'name': name,
-                    'type': type_info.get('type', 'unknown'),
-                    'modifiers': type_info.get('metadata', {}).get('modifiers', []),
-                    'member_counts': type_info.get('metadata', {}).get('member_counts', {})
-                }
-            return {'all_types': all_types}
+            cached = self._all_types_cache
+            if cached is None or cached[0] is not self.detailed_index:
+                all_types = {}
+                for name, type_info in self.detailed_index.get('types', {}).items():
+                    all_types[name] = {
+                        'name': name,
+                        'type': type_info.get('type', 'unknown'),
+                        'modifiers': type_info.get('metadata', {}).get('modifiers', []),
+                        'member_counts': type_info.get('metadata', {}).get('member_counts', {})
+                    }
+                cached = self._all_types_cache = (self.detailed_index, all_types)
+            # 逐项复制，连同 modifiers 和 member_counts，调用方修改返回值不会影响缓存和索引
+            return {'all_types': {
+                name: {**info,
+                       'modifiers': list(info['modifiers']),
+                       'member_counts': dict(info['member_counts'])}
+                for name, info in cached[1].items()
+            }}
         
         if type_name not in self.detailed_index.get('types', {}):
             return {'error': f'类型 {type_name} 不存在'}
@@ -213,13 +239,14 @@ class MCPCodeTools:
             }
             
             # 收集所有关系
+            name_of = self._get_node_name_lookup()
             for rel in self.kg_data.get('relationships', []):
                 rel_type = rel['type']
                 from_id = rel['from']
                 to_id = rel['to']
                 
-                from_name = self._get_node_name_by_id(from_id)
-                to_name = self._get_node_name_by_id(to_id)
+                from_name = name_of(from_id)
+                to_name = name_of(to_id)
                 
                 if from_name and to_name:
                     relationship_entry = {
@@ -255,33 +282,33 @@ class MCPCodeTools:
         if not target_node_id:
             return {'error': f'类型 {type_name} 不存在'}
         
-        # 分析关系
-        for rel in self.kg_data.get('relationships', []):
+        # 通过邻接表只访问与目标类型相连的关系
+        name_of = self._get_node_name_lookup()
+        for rel in self._outgoing.get(target_node_id, []):
+            # 当前类型作为源
             rel_type = rel['type']
-            from_id = rel['from']
-            to_id = rel['to']
-            
-            if from_id == target_node_id:
-                # 当前类型作为源
-                target_name = self._get_node_name_by_id(to_id)
-                if target_name:
-                    if rel_type == 'inherits_from':
-                        relationships['inherits_from'].append(target_name)
-                    elif rel_type == 'uses':
-                        relationships['uses'].append(target_name)
-                    elif rel_type == 'contains':
-                        relationships['contains'].append(target_name)
-            
-            elif to_id == target_node_id:
-                # 当前类型作为目标
-                source_name = self._get_node_name_by_id(from_id)
-                if source_name:
-                    if rel_type == 'inherits_from':
-                        relationships['inherited_by'].append(source_name)
-                    elif rel_type == 'uses':
-                        relationships['used_by'].append(source_name)
-                    elif rel_type == 'contains':
-                        relationships['contained_in'].append(source_name)
+            target_name = name_of(rel['to'])
+            if target_name:
+                if rel_type == 'inherits_from':
+                    relationships['inherits_from'].append(target_name)
+                elif rel_type == 'uses':
+                    relationships['uses'].append(target_name)
+                elif rel_type == 'contains':
+                    relationships['contains'].append(target_name)
+        
+        for rel in self._incoming.get(target_node_id, []):
+            # 当前类型作为目标（自环已在出边中处理）
+            if rel['from'] == target_node_id:
+                continue
+            rel_type = rel['type']
+            source_name = name_of(rel['from'])
+            if source_name:
+                if rel_type == 'inherits_from':
+                    relationships['inherited_by'].append(source_name)
+                elif rel_type == 'uses':
+                    relationships['used_by'].append(source_name)
+                elif rel_type == 'contains':
+                    relationships['contained_in'].append(source_name)
         
         return {
             'type_name': type_name,
@@ -335,15 +362,46 @@ class MCPCodeTools:
         param_str = ', '.join([f"{p.get('type', '')} {p.get('name', '')}" for p in params])
         return f"{method['name']}({param_str}): {method.get('return_type', 'void')}"
     
+    def _build_indexes(self):
+        """构建节点索引和邻接表，kg_data 未变化时直接复用"""
+        if self._index_source is self.kg_data:
+            return
+        
+        kg_data = self.kg_data or {}
+        node_index = {}
+        for node in kg_data.get('nodes', []):
+            # ID 重复时保留第一个节点
+            node_index.setdefault(node['id'], node)
+        
+        # 邻接表中的关系保持原始顺序
+        outgoing = {}
+        incoming = {}
+        for rel in kg_data.get('relationships', []):
+            outgoing.setdefault(rel['from'], []).append(rel)
+            incoming.setdefault(rel['to'], []).append(rel)
+        
+        self._node_index = node_index
+        self._node_names = {node_id: node['name'] for node_id, node in node_index.items()}
+        self._outgoing = outgoing
+        self._incoming = incoming
+        self._index_source = self.kg_data
+    
+    def _get_node_index(self) -> Dict[str, Dict[str, Any]]:
+        """获取节点ID到节点的索引"""
+        self._build_indexes()
+        return self._node_index
+    
+    def _get_node_name_lookup(self):
+        """获取按节点ID查名称的函数（即 ID -> 名称 字典的 get），供循环中提前取出复用"""
+        self._build_indexes()
+        return self._node_names.get
+    
     def _get_node_name_by_id(self, node_id: str) -> Optional[str]:
         """根据节点ID获取节点名称"""
         if not self.kg_data:
             return None
         
-        for node in self.kg_data.get('nodes', []):
-            if node['id'] == node_id:
-                return node['name']
-        return None
+        return self._get_node_name_lookup()(node_id)
     
     def _generate_architecture_summary(self, arch_info: Dict[str, Any]) -> str:
         """生成架构摘要"""
@@ -474,11 +532,11 @@ class MCPCodeTools:
                 
                 # 方法4: 通过关系查找包含该类型的命名空间
                 if not matched_namespace:
-                    for rel in self.kg_data.get('relationships', []):
-                        if rel['type'] == 'contains' and rel['to'] == node_id:
-                            parent_node = next((n for n in self.kg_data.get('nodes', []) 
-                                              if n['id'] == rel['from'] and n['type'] == 'namespace'), None)
-                            if parent_node:
+                    self._build_indexes()
+                    for rel in self._incoming.get(node_id, []):
+                        if rel['type'] == 'contains':
+                            parent_node = self._node_index.get(rel['from'])
+                            if parent_node and parent_node['type'] == 'namespace':
                                 matched_namespace = parent_node['name']
                                 break
                 
@@ -553,23 +611,22 @@ class MCPCodeTools:
         """分析类之间的依赖关系"""
         dependencies = {}
         
-        # 获取所有类
+        # 获取所有类，以及可作为依赖目标的类型名
         classes = [node['name'] for node in self.kg_data.get('nodes', []) if node['type'] == 'class']
+        type_names = {node['name'] for node in self.kg_data.get('nodes', []) if node['type'] in ['class', 'interface']}
         
-        for class_name in classes:
-            class_deps = set()
-            
-            # 查找该类的所有关系
-            for rel in self.kg_data.get('relationships', []):
-                from_name = self._get_node_name_by_id(rel['from'])
-                to_name = self._get_node_name_by_id(rel['to'])
-                
-                if from_name == class_name and to_name and to_name != class_name:
-                    # 检查目标是否也是类
-                    if any(node['name'] == to_name and node['type'] in ['class', 'interface'] 
-                          for node in self.kg_data.get('nodes', [])):
-                        class_deps.add(f"{to_name} ({rel['type']})")
+        # 一次遍历关系，按源节点名称分组
+        deps_by_name = {}
+        name_of = self._get_node_name_lookup()
+        for rel in self.kg_data.get('relationships', []):
+            from_name = name_of(rel['from'])
+            to_name = name_of(rel['to'])
             
+            if from_name and to_name and to_name != from_name and to_name in type_names:
+                deps_by_name.setdefault(from_name, set()).add(f"{to_name} ({rel['type']})")
+        
+        for class_name in classes:
+            class_deps = deps_by_name.get(class_name)
             if class_deps:
                 dependencies[class_name] = list(class_deps)[:10]  # 限制显示数量
         
@@ -582,31 +639,33 @@ class MCPCodeTools:
         # 获取所有接口
         interfaces = [node['name'] for node in self.kg_data.get('nodes', []) if node['type'] == 'interface']
         
+        # 一次遍历继承关系，按被继承的类型名称分组
+        implementers_by_name = {}
+        name_of = self._get_node_name_lookup()
+        for rel in self.kg_data.get('relationships', []):
+            if rel['type'] == 'inherits_from':
+                from_name = name_of(rel['from'])
+                to_name = name_of(rel['to'])
+                
+                if to_name and from_name:
+                    implementers_by_name.setdefault(to_name, []).append(from_name)
+        
         for interface_name in interfaces:
-            implementers = []
-            
-            # 查找实现该接口的类
-            for rel in self.kg_data.get('relationships', []):
-                if rel['type'] == 'inherits_from':
-                    from_name = self._get_node_name_by_id(rel['from'])
-                    to_name = self._get_node_name_by_id(rel['to'])
-                    
-                    if to_name == interface_name and from_name:
-                        implementers.append(from_name)
-            
+            implementers = implementers_by_name.get(interface_name)
             if implementers:
-                implementations[interface_name] = implementers
+                implementations[interface_name] = list(implementers)
         
         return implementations
     
     def _analyze_inheritance_chains(self) -> Dict[str, Dict[str, List[str]]]:
         """分析继承链"""
         inheritance = {'base_classes': {}, 'derived_classes': {}}
+        name_of = self._get_node_name_lookup()
         
         for rel in self.kg_data.get('relationships', []):
             if rel['type'] == 'inherits_from':
-                derived_name = self._get_node_name_by_id(rel['from'])
-                base_name = self._get_node_name_by_id(rel['to'])
+                derived_name = name_of(rel['from'])
+                base_name = name_of(rel['to'])
                 
                 if derived_name and base_name:
                     # 基类 -> 派生类
@@ -625,19 +684,25 @@ class MCPCodeTools:
         """分析组合关系（包含关系）"""
         composition = {}
         
+        # 按名称预先索引节点（同名时取第一个），避免对每条关系扫描全部节点
+        class_names = set()
+        first_node_by_name = {}
+        for node in self.kg_data.get('nodes', []):
+            first_node_by_name.setdefault(node['name'], node)
+            if node['type'] == 'class':
+                class_names.add(node['name'])
+        
+        name_of = self._get_node_name_lookup()
         for rel in self.kg_data.get('relationships', []):
             if rel['type'] == 'contains':
-                container_name = self._get_node_name_by_id(rel['from'])
-                contained_name = self._get_node_name_by_id(rel['to'])
+                container_name = name_of(rel['from'])
+                contained_name = name_of(rel['to'])
                 
                 if container_name and contained_name:
                     # 检查是否为类级别的包含关系
-                    container_node = next((n for n in self.kg_data.get('nodes', []) 
-                                         if n['name'] == container_name and n['type'] == 'class'), None)
-                    contained_node = next((n for n in self.kg_data.get('nodes', []) 
-                                         if n['name'] == contained_name), None)
+                    contained_node = first_node_by_name.get(contained_name)
                     
-                    if container_node and contained_node:
+                    if container_name in class_names and contained_node:
                         if container_name not in composition:
                             composition[container_name] = []
                         composition[container_name].append(f"{contained_name} ({contained_node['type']})")
@@ -663,12 +728,12 @@ class MCPCodeTools:
             summary_parts.append(f"采用接口抽象设计，接口与类的比例为{interfaces}:{classes}")
         
         # 继承关系统计
-        inheritance_count = len([r for r in self.kg_data.get('relationships', []) if r['type'] == 'inherits_from'])
+        inheritance_count = count_by_type(self.kg_data, 'relationships', 'inherits_from')
         if inheritance_count > 0:
             summary_parts.append(f"存在{inheritance_count}个继承关系")
         
         # 组合关系统计
-        composition_count = len([r for r in self.kg_data.get('relationships', []) if r['type'] == 'contains'])
+        composition_count = count_by_type(self.kg_data, 'relationships', 'contains')
         if composition_count > 0:
             summary_parts.append(f"{composition_count}个组合/包含关系")
         
@@ -701,10 +766,10 @@ class MCPCodeTools:
                 'to': rel.get('to')
             })
         
-        # 分析ID模式
-        node_ids = [node.get('id', '') for node in self.kg_data.get('nodes', [])]
+        # 分析ID模式（只取前10个节点，不构造完整的ID列表）
         debug_info['node_id_patterns'] = [
-            id for id in node_ids[:10] if id  # 前10个ID样本
+            node.get('id', '') for node in islice(self.kg_data.get('nodes', []), 10)
+            if node.get('id', '')  # 前10个ID样本
         ]
         
         # 采样metadata结构
@@ -721,6 +786,7 @@ class MCPCodeTools:
         # 新增: 命名空间分析调试
         namespaces = []
         classes = []
+        total_classes = 0
         
         for node in self.kg_data.get('nodes', []):
             if node['type'] == 'namespace':
@@ -730,15 +796,18 @@ class MCPCodeTools:
                     'full_path': node.get('metadata', {}).get('full_path', 'N/A')
                 })
             elif node['type'] == 'class':
-                classes.append({
-                    'name': node.get('name'),
-                    'id': node.get('id'),
-                    'full_path': node.get('metadata', {}).get('full_path', 'N/A')
-                })
+                # 类只用于计数和前3个样本，超出部分不再构造字典
+                total_classes += 1
+                if len(classes) < 3:
+                    classes.append({
+                        'name': node.get('name'),
+                        'id': node.get('id'),
+                        'full_path': node.get('metadata', {}).get('full_path', 'N/A')
+                    })
         
         debug_info['namespace_analysis'] = {
             'total_namespaces': len(namespaces),
-            'total_classes': len(classes),
+            'total_classes': total_classes,
             'namespace_samples': namespaces[:3],
             'class_samples': classes[:3],
             'id_matching_attempts': self._debug_id_matching(namespaces, classes)
@@ -2,11 +2,19 @@
 分层摘要生成器
 生成不同层次的代码摘要，适应不同的上下文长度需求
 """
-import json
 from typing import Dict, List, Any, Optional
+from collections import Counter
 from pathlib import Path
+import sys
 import logging
 
+# 添加源码根目录路径
+_SRC_PATH = str(Path(__file__).parent.parent)
+if _SRC_PATH not in sys.path:
+    sys.path.append(_SRC_PATH)
+import json_io
+from .graph_stats import count_by_type
+
 class LayeredSummaryGenerator:
     """分层摘要生成器"""
     
@@ -39,7 +47,7 @@ class LayeredSummaryGenerator:
         interfaces = node_types.get('interface', 0)
         
         # 命名空间去重处理
-        namespaces = list(set([node['name'] for node in kg_data.get('nodes', []) if node['type'] == 'namespace']))
+        namespaces = list({node['name'] for node in kg_data.get('nodes', []) if node['type'] == 'namespace'})
         main_classes = []
         
         for node in kg_data.get('nodes', []):
@@ -70,7 +78,7 @@ class LayeredSummaryGenerator:
         ]
         
         # 命名空间去重并排序
-        namespaces = sorted(list(set([node['name'] for node in kg_data.get('nodes', []) if node['type'] == 'namespace'])))
+        namespaces = sorted({node['name'] for node in kg_data.get('nodes', []) if node['type'] == 'namespace'})
         
         # 分组显示，每行显示多个命名空间
         for i in range(0, len(namespaces), 4):
@@ -229,13 +237,7 @@ class LayeredSummaryGenerator:
     
     def _analyze_key_relationships(self, kg_data: Dict[str, Any]) -> Dict[str, int]:
         """分析关键关系"""
-        relationships = {}
-        
-        for rel in kg_data.get('relationships', []):
-            rel_type = rel['type']
-            relationships[rel_type] = relationships.get(rel_type, 0) + 1
-        
-        return relationships
+        return dict(Counter(rel['type'] for rel in kg_data.get('relationships', [])))
     
     def _generate_ultra_brief_summary(self, kg_data: Dict[str, Any]) -> str:
         """生成超级简洁摘要"""
@@ -392,12 +394,12 @@ class LayeredSummaryGenerator:
         features = []
         
         # 检查接口使用
-        interface_count = len([n for n in kg_data.get('nodes', []) if n['type'] == 'interface'])
+        interface_count = count_by_type(kg_data, 'nodes', 'interface')
         if interface_count > 0:
             features.append(f"接口抽象({interface_count}个)")
         
         # 检查继承关系
-        inheritance_count = len([r for r in kg_data.get('relationships', []) if r['type'] == 'inherits_from'])
+        inheritance_count = count_by_type(kg_data, 'relationships', 'inherits_from')
         if inheritance_count > 0:
             features.append(f"继承设计({inheritance_count}处)")
         
@@ -504,8 +506,8 @@ class LayeredSummaryGenerator:
     def _analyze_dependencies(self, kg_data: Dict[str, Any]) -> str:
         """分析依赖关系"""
         # 简化实现
-        inheritance_count = len([r for r in kg_data.get('relationships', []) if r['type'] == 'inherits_from'])
-        usage_count = len([r for r in kg_data.get('relationships', []) if r['type'] == 'uses'])
+        inheritance_count = count_by_type(kg_data, 'relationships', 'inherits_from')
+        usage_count = count_by_type(kg_data, 'relationships', 'uses')
         
         return f"- 继承依赖: {inheritance_count}处\n- 使用依赖: {usage_count}处"
     
@@ -577,8 +579,7 @@ class LayeredSummaryGenerator:
             }
         }
         
-        with open(output_path / "summary_index.json", 'w', encoding='utf-8') as f:
-            json.dump(index_data, f, ensure_ascii=False, indent=2)
+        json_io.dump_file(output_path / "summary_index.json", index_data)
     
     def _get_summary_description(self, summary_type: str) -> str:
         """获取摘要类型描述"""
@@ -2,7 +2,6 @@
 向量索引器
 将知识图谱转换为向量索引，支持语义检索
 """
-import json
 import hashlib
 from typing import Dict, List, Any, Optional, Tuple
 from pathlib import Path
@@ -10,8 +9,11 @@ import logging
 
 # 添加核心模块路径
 import sys
-sys.path.append(str(Path(__file__).parent.parent))
+_SRC_PATH = str(Path(__file__).parent.parent)
+if _SRC_PATH not in sys.path:
+    sys.path.append(_SRC_PATH)
 from core.base_parser import CodeNode
+import json_io
 
 class CodeBlock:
     """代码块类，用于向量索引的基本单元"""
@@ -218,8 +220,7 @@ class VectorIndexer:
                 }
             }
             
-            with open(output_path, 'w', encoding='utf-8') as f:
-                json.dump(index_data, f, ensure_ascii=False, indent=2)
+            json_io.dump_file(output_path, index_data)
             
             self.logger.info(f"向量索引已保存到: {output_path}")
         except Exception as e:
@@ -228,8 +229,7 @@ class VectorIndexer:
     def load_index(self, index_path: str):
         """从文件加载索引"""
         try:
-            with open(index_path, 'r', encoding='utf-8') as f:
-                index_data = json.load(f)
+            index_data = json_io.load_file(index_path)
             
             self.code_blocks = []
             for block_data in index_data.get('blocks', []):
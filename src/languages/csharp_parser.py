@@ -5,14 +5,36 @@ C#语言解析器
 import tree_sitter
 from tree_sitter import Language, Parser
 from typing import Dict, List, Any, Optional, Set
+from functools import lru_cache
 import os
 import sys
 from pathlib import Path
 
 # 添加核心模块路径
-sys.path.append(str(Path(__file__).parent.parent))
+_SRC_PATH = str(Path(__file__).parent.parent)
+if _SRC_PATH not in sys.path:
+    sys.path.append(_SRC_PATH)
 from core.base_parser import BaseParser, CodeNode
 
+# 语法树节点类型集合，遍历每个子节点时都会做成员判断，使用集合按哈希查找
+_TYPE_DECLARATIONS = frozenset({"class_declaration", "interface_declaration", "struct_declaration", "enum_declaration"})
+_MEMBER_DECLARATIONS = frozenset({"field_declaration", "method_declaration", "property_declaration", "constructor_declaration"})
+_BASE_TYPE_NODES = frozenset({"identifier", "qualified_name", "generic_name"})
+_RETURN_TYPE_NODES = frozenset({"predefined_type", "identifier", "qualified_name", "generic_name", "array_type", "nullable_type"})
+_PARAMETER_TYPE_NODES = frozenset({"predefined_type", "identifier", "qualified_name", "generic_name", "array_type"})
+
+
+@lru_cache(maxsize=None)
+def _load_language(library_path: str) -> Language:
+    """加载C#语言库，同一路径只加载一次，供所有解析器实例共享"""
+    # 尝试加载C#语言库
+    if os.path.exists(library_path):
+        return Language(library_path, 'c_sharp')
+    # 如果没有找到预编译库，尝试使用tree-sitter-c-sharp
+    import tree_sitter_c_sharp as tscsharp
+    return Language(tscsharp.language(), 'c_sharp')
+
+
 class CSharpParser(BaseParser):
     """C#语言解析器"""
     
@@ -23,14 +45,7 @@ class CSharpParser(BaseParser):
     def _init_parser(self, library_path: str):
         """初始化C# tree-sitter解析器"""
         try:
-            # 尝试加载C#语言库
-            if os.path.exists(library_path):
-                self.language = Language(library_path, 'c_sharp')
-            else:
-                # 如果没有找到预编译库，尝试使用tree-sitter-c-sharp
-                import tree_sitter_c_sharp as tscsharp
-                self.language = Language(tscsharp.language(), 'c_sharp')
-            
+            self.language = _load_language(library_path)
             self.parser = Parser()
             self.parser.set_language(self.language)
             self.logger.info("C# parser initialized successfully")
@@ -69,7 +84,7 @@ class CSharpParser(BaseParser):
                 
                 # 递归提取命名空间内容
                 self._extract_namespace_content(child, source_code, namespace_node)
-            elif child.type in ["class_declaration", "interface_declaration", "struct_declaration", "enum_declaration"]:
+            elif child.type in _TYPE_DECLARATIONS:
                 # 全局类型声明（不在命名空间中）
                 type_node = self._create_type_node(child, source_code)
                 parent.add_child(type_node)
@@ -93,11 +108,11 @@ class CSharpParser(BaseParser):
                         nested_namespace = self._create_namespace_node(decl_child, source_code)
                         parent.add_child(nested_namespace)
                         self._extract_namespace_content(decl_child, source_code, nested_namespace)
-                    elif decl_child.type in ["class_declaration", "interface_declaration", "struct_declaration", "enum_declaration"]:
+                    elif decl_child.type in _TYPE_DECLARATIONS:
                         type_node = self._create_type_node(decl_child, source_code)
                         parent.add_child(type_node)
                         self._extract_type_content(decl_child, source_code, type_node)
-            elif child.type in ["class_declaration", "interface_declaration", "struct_declaration", "enum_declaration"]:
+            elif child.type in _TYPE_DECLARATIONS:
                 # 直接的类型声明
                 type_node = self._create_type_node(child, source_code)
                 parent.add_child(type_node)
@@ -123,12 +138,12 @@ class CSharpParser(BaseParser):
                     elif decl_child.type == "constructor_declaration":
                         constructor_node = self._create_constructor_node(decl_child, source_code)
                         parent.add_child(constructor_node)
-                    elif decl_child.type in ["class_declaration", "interface_declaration", "struct_declaration", "enum_declaration"]:
+                    elif decl_child.type in _TYPE_DECLARATIONS:
                         # 嵌套类型
                         nested_type_node = self._create_type_node(decl_child, source_code)
                         parent.add_child(nested_type_node)
                         self._extract_type_content(decl_child, source_code, nested_type_node)
-            elif child.type in ["field_declaration", "method_declaration", "property_declaration", "constructor_declaration"]:
+            elif child.type in _MEMBER_DECLARATIONS:
                 # 直接的成员声明
                 if child.type == "field_declaration":
                     field_nodes = self._create_field_nodes(child, source_code)
@@ -298,7 +313,7 @@ class CSharpParser(BaseParser):
         for child in node.children:
             if child.type == "base_list":
                 for base_child in child.children:
-                    if base_child.type in ["identifier", "qualified_name", "generic_name"]:
+                    if base_child.type in _BASE_TYPE_NODES:
                         base_type = self._get_node_text(base_child, source_code).strip()
                         if base_type and base_type != ",":
                             base_types.append(base_type)
@@ -307,7 +322,7 @@ class CSharpParser(BaseParser):
     def _extract_return_type(self, node, source_code: bytes) -> str:
         """提取方法返回类型"""
         for child in node.children:
-            if child.type in ["predefined_type", "identifier", "qualified_name", "generic_name", "array_type", "nullable_type"]:
+            if child.type in _RETURN_TYPE_NODES:
                 return self._get_node_text(child, source_code).strip()
         return "void"
     
@@ -350,7 +365,7 @@ class CSharpParser(BaseParser):
         modifiers = []
         
         for child in param_node.children:
-            if child.type in ["predefined_type", "identifier", "qualified_name", "generic_name", "array_type"]:
+            if child.type in _PARAMETER_TYPE_NODES:
                 if not param_type:  # 第一个类型节点是参数类型
                     param_type = self._get_node_text(child, source_code).strip()
                 else:  # 第二个标识符节点是参数名
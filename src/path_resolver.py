@@ -4,11 +4,13 @@
 """
 
 import os
-import json
 from pathlib import Path
 from typing import List, Optional, Dict, Any
 import logging
 
+from . import json_io
+from .user_manager import load_user_records
+
 logger = logging.getLogger(__name__)
 
 class PathResolver:
@@ -29,6 +31,8 @@ class PathResolver:
         self.search_strategies = {}
         self.auto_detection = {}
         self.path_patterns = {}
+        # 用户工作空间路径缓存，配置变更时清空
+        self._user_workspace_cache: Dict[str, Path] = {}
         self._load_config()
     
     def _load_config(self):
@@ -36,8 +40,7 @@ class PathResolver:
         try:
             # 加载主配置文件
             if self.config_file.exists():
-                with open(self.config_file, 'r', encoding='utf-8') as f:
-                    self.config = json.load(f)
+                self.config = json_io.load_file(self.config_file)
                     
                 # 应用配置
                 self.workspace_root = Path(self.config.get('workspace_root', './workspace'))
@@ -59,8 +62,7 @@ class PathResolver:
                 }
                 try:
                     self.config_file.parent.mkdir(parents=True, exist_ok=True)
-                    with open(self.config_file, 'w', encoding='utf-8') as f:
-                        json.dump(self.config, f, indent=2, ensure_ascii=False)
+                    json_io.dump_file(self.config_file, self.config)
 
                     # 应用配置到实例
                     self.workspace_root = Path(self.config.get('workspace_root', './workspace'))
@@ -82,17 +84,23 @@ class PathResolver:
     def _load_fallback_config(self):
         """加载备用配置（从user_headers.json获取用户信息）"""
         try:
-            user_headers_file = Path("./user_headers.json")
-            if user_headers_file.exists():
-                with open(user_headers_file, 'r', encoding='utf-8') as f:
-                    config = json.load(f)
-                    # 获取第一个用户作为默认用户
-                    if config and isinstance(config, dict):
-                        self.default_username = list(config.keys())[0]
-                        logger.info(f"从user_headers.json检测到默认用户: {self.default_username}")
+            # 快照之后的变更记录在变更日志中，需一并回放
+            config = load_user_records("./user_headers.json")
+            # 获取第一个用户作为默认用户
+            if config:
+                self.default_username = next(iter(config))
+                logger.info(f"从user_headers.json检测到默认用户: {self.default_username}")
         except Exception as e:
             logger.warning(f"加载备用配置失败: {e}")
     
+    def _user_workspace(self, username: str) -> Path:
+        """获取用户工作空间路径（workspace_root/repo/username），结果按用户名缓存"""
+        user_workspace = self._user_workspace_cache.get(username)
+        if user_workspace is None:
+            user_workspace = self.workspace_root / "repo" / username
+            self._user_workspace_cache[username] = user_workspace
+        return user_workspace
+    
     def resolve_project_path(self, input_path: str, username: Optional[str] = None) -> str:
         """
         智能解析项目路径
@@ -116,7 +124,7 @@ class PathResolver:
             return input_path
         
         # 构建用户工作空间路径
-        user_workspace = self.workspace_root / "repo" / target_username
+        user_workspace = self._user_workspace(target_username)
         
         # 策略1: 直接在用户工作空间下查找
         candidate_path = user_workspace / input_path
@@ -187,7 +195,7 @@ class PathResolver:
         if not target_username:
             return []
         
-        user_workspace = self.workspace_root / "repo" / target_username
+        user_workspace = self._user_workspace(target_username)
         projects = []
         
         if user_workspace.exists():
@@ -244,12 +252,12 @@ class PathResolver:
             return False
             
         self.default_username = username
+        self._user_workspace_cache.clear()
         
         # 更新配置文件
         try:
             self.config['default_username'] = username
-            with open(self.config_file, 'w', encoding='utf-8') as f:
-                json.dump(self.config, f, indent=2, ensure_ascii=False)
+            json_io.dump_file(self.config_file, self.config)
             logger.info(f"默认用户已更新为: {username}")
             return True
         except Exception as e:
@@ -271,10 +279,10 @@ class PathResolver:
             self.search_strategies = self.config.get('search_strategies', {})
             self.auto_detection = self.config.get('auto_detection', {})
             self.path_patterns = self.config.get('path_patterns', {})
+            self._user_workspace_cache.clear()
             
             # 保存到文件
-            with open(self.config_file, 'w', encoding='utf-8') as f:
-                json.dump(self.config, f, indent=2, ensure_ascii=False)
+            json_io.dump_file(self.config_file, self.config)
             
             logger.info("配置已更新")
             return True
@@ -297,7 +305,7 @@ class PathResolver:
         if not target_username:
             return []
         
-        user_workspace = self.workspace_root / "repo" / target_username
+        user_workspace = self._user_workspace(target_username)
         suggestions = []
         
         if user_workspace.exists():
@@ -348,6 +356,7 @@ class PathResolver:
             return 0.7
         
         # 模糊匹配（简单的字符匹配）
+        # 注意：get_project_suggestions 只收集包含 partial_name 的项目，目前不会走到这里
         common_chars = sum(1 for c in partial_lower if c in project_lower)
         return common_chars / max(len(partial_lower), len(project_lower))
     
@@ -359,9 +368,9 @@ class PathResolver:
                 readme_path = project_path / readme_name
                 if readme_path.exists():
                     with open(readme_path, 'r', encoding='utf-8') as f:
-                        lines = f.readlines()
+                        # 逐行读取，找到描述后即停止，不读入整个文件
                         # 获取第一行非空行作为描述
-                        for line in lines:
+                        for line in f:
                             line = line.strip()
                             if line and not line.startswith('#'):
                                 return line[:100] + ('...' if len(line) > 100 else '')
@@ -371,9 +380,8 @@ class PathResolver:
             # 尝试从package.json获取描述
             package_json = project_path / 'package.json'
             if package_json.exists():
-                with open(package_json, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    return data.get('description', '')
+                data = json_io.load_file(package_json)
+                return data.get('description', '')
                     
         except Exception:
             pass
@@ -2,7 +2,9 @@
 SSE包装器模块 - 用于拦截和解析POST请求的header字段
 """
 
+import asyncio
 import logging
+from functools import lru_cache, partial
 from typing import Dict, Any, Tuple
 from pathlib import Path
 from mcp.server.sse import SseServerTransport
@@ -10,46 +12,79 @@ from mcp.server.sse import SseServerTransport
 from starlette.requests import Request
 from starlette.responses import Response
 from uuid import UUID
-from pydantic import ValidationError
+from pydantic import TypeAdapter, ValidationError
 from mcp import types
 from mcp.server.session import ServerMessageMetadata, SessionMessage
 
-from .user_manager import UserManager
+from .gitlab_puller import AsyncOperationStatus
+from .user_manager import get_shared_user_manager
 
 logger = logging.getLogger("sse-wrapper")
 
+# 预先构建的 JSON-RPC 消息校验器，所有请求共用
+_JSONRPC_ADAPTER = TypeAdapter(types.JSONRPCMessage)
+
+# 视为真值的 header 取值（ASGI 原始 header 为小写字节串）
+_TRUE_VALUES = frozenset((b'true', b'1', b'yes'))
+
+# 需要提取的 header 字段: (字段名, 默认值, 是否为布尔字段)
+_HEADER_FIELDS = (
+    ('username', '', False),
+    ('git_token', '', False),
+    ('repo', '', False),
+    ('branch', 'main', False),
+    ('sync', '', True),
+    ('force_clean', '', True),
+)
+
+
+def _compile_header_extractor():
+    """
+    在初始化时生成专用的 header 提取函数
+
+    生成的函数先用 dict(headers.raw) 在 C 层一次性建立字节键索引，
+    再把各字段的查找内联为一个固定结构的字典字面量，只解码需要的值，
+    避免每次请求时的循环、分支以及 Headers.get 对原始列表的重复扫描。
+    传入的 headers 需提供 ASGI 原始 header 列表（如 starlette 的 Headers）。
+    """
+    entries = []
+    for name, default, is_bool in _HEADER_FIELDS:
+        key = name.encode('latin-1')
+        if is_bool:
+            entries.append(f"{name!r}: d.get({key!r}, b'').lower() in _T")
+        else:
+            entries.append(f"{name!r}: d.get({key!r}, {default.encode('latin-1')!r}).decode('latin-1')")
+    src = (
+        "def _extract_custom_headers(h):\n"
+        "    d = dict(h.raw)\n"
+        "    return {" + ", ".join(entries) + "}\n"
+    )
+    namespace = {'_T': _TRUE_VALUES}
+    exec(src, namespace)
+    return namespace['_extract_custom_headers']
+
+
+@lru_cache(maxsize=4096)
+def _parse_session_id(session_id_param: str) -> UUID:
+    """解析 session_id；同一会话的后续请求直接命中缓存"""
+    return UUID(hex=session_id_param)
+
+
 class CustomSseWrapper(SseServerTransport):
     """自定义SSE传输类，继承SseServerTransport并添加header字段解析功能"""
     
     def __init__(self, endpoint: str = "/messages/", storage_file: str = "user_headers.json", workspace_root: str = "./workspace"):
         super().__init__(endpoint)
-        self.user_manager = UserManager(storage_file, workspace_root)
+        # 相同存储文件和工作空间的包装器共用同一个用户管理器
+        self.user_manager = get_shared_user_manager(storage_file, workspace_root)
         # 保留原有的 headers 属性以保持向后兼容性
         self.headers = {}
+        # 从headers中提取特定的字段值（初始化时生成的专用函数）
+        self._extract_custom_headers = _compile_header_extractor()
+        # (用户名, 仓库, 分支) -> 正在进行的仓库同步任务ID，避免重复启动同一仓库分支的同步
+        self._inflight_syncs: Dict[Tuple[str, str, str], str] = {}
 
 
-    def _extract_custom_headers(self, headers: Dict[bytes, bytes]) -> Dict[str, str]:
-        """从headers中提取特定的字段值"""
-        # 将headers转换为小写键的字典，便于查找
-        headers_dict = {}
-        for key, value in headers.items():
-            if isinstance(key, bytes):
-                key = key.decode('utf-8', errors='ignore').lower()
-            if isinstance(value, bytes):
-                value = value.decode('utf-8', errors='ignore')
-            headers_dict[key] = value
-        # 提取特定字段
-        extracted_fields = {
-            'username': headers_dict.get('username', ''),
-            'git_token': headers_dict.get('git_token', ''),
-            'repo': headers_dict.get('repo', ''),
-            'branch': headers_dict.get('branch', 'main'),
-            'sync': headers_dict.get('sync', '').lower() in ['true', '1', 'yes'],
-            'force_clean': headers_dict.get('force_clean', '').lower() in ['true', '1', 'yes']
-        }
-        
-        return extracted_fields
-        
     async def handle_post_message(self, scope, receive, send):
         """重写POST消息处理，在原有逻辑基础上添加header字段提取功能"""
         # headers = dict(scope.get("headers", []))
@@ -60,14 +95,20 @@ class CustomSseWrapper(SseServerTransport):
         logger.debug("Handling POST message")
         request = Request(scope, receive)
 
-        extract_headers = self._extract_custom_headers(request.headers)
-        user_id = extract_headers.get("username")
+        # Validate request headers for DNS rebinding protection
+        error_response = await self._security.validate_request(request, is_post=True)
+        if error_response:
+            return await error_response(scope, receive, send)
+
+        # 仅在携带用户名时才提取完整的 header 字段
+        user_id = request.headers.get("username")
 
         # 使用 UserManager 管理用户信息
         if user_id:
+            extract_headers = self._extract_custom_headers(request.headers)
             try:
-                # 先添加或更新用户信息（不自动同步）
-                user_headers = self.user_manager.add_or_update_user(extract_headers)
+                # 先添加或更新用户信息（不自动同步），在工作线程中执行以免写盘阻塞事件循环
+                user_headers = await asyncio.to_thread(self.user_manager.add_or_update_user, extract_headers)
                 logger.info(f"用户 {user_id} 的 headers 信息已更新")
                 
                 # 使用异步仓库同步操作，避免阻塞进程
@@ -75,8 +116,7 @@ class CustomSseWrapper(SseServerTransport):
                 # 1. 仓库不存在时总是拉取
                 # 2. 仓库存在时根据sync参数和时间间隔决定是否更新
                 try:
-                    task_id = self.user_manager.sync_user_repository_async(user_id)
-                    logger.info(f"用户 {user_id} 的异步仓库同步已启动，任务ID: {task_id}")
+                    self._start_repository_sync(user_id, user_headers.repo, user_headers.branch)
                 except Exception as sync_error:
                     logger.warning(f"用户 {user_id} 启动异步仓库同步失败: {sync_error}")
                 
@@ -87,11 +127,6 @@ class CustomSseWrapper(SseServerTransport):
         else:
             logger.warning("未找到用户名，无法保存 headers 信息")
 
-        # Validate request headers for DNS rebinding protection
-        error_response = await self._security.validate_request(request, is_post=True)
-        if error_response:
-            return await error_response(scope, receive, send)
-
         session_id_param = request.query_params.get("session_id")
         if session_id_param is None:
             logger.warning("Received request without session_id")
@@ -99,8 +134,8 @@ class CustomSseWrapper(SseServerTransport):
             return await response(scope, receive, send)
 
         try:
-            session_id = UUID(hex=session_id_param)
-            logger.debug(f"Parsed session ID: {session_id}")
+            session_id = _parse_session_id(session_id_param)
+            logger.debug("Parsed session ID: %s", session_id)
         except ValueError:
             logger.warning(f"Received invalid session ID: {session_id_param}")
             response = Response("Invalid session ID", status_code=400)
@@ -113,11 +148,15 @@ class CustomSseWrapper(SseServerTransport):
             return await response(scope, receive, send)
 
         body = await request.body()
-        logger.debug(f"Received JSON: {body}")
+        # 请求体和消息可能很大，未开启 DEBUG 时跳过格式化
+        debug_enabled = logger.isEnabledFor(logging.DEBUG)
+        if debug_enabled:
+            logger.debug("Received JSON: %s", body)
 
         try:
-            message = types.JSONRPCMessage.model_validate_json(body)
-            logger.debug(f"Validated client message: {message}")
+            message = _JSONRPC_ADAPTER.validate_json(body)
+            if debug_enabled:
+                logger.debug("Validated client message: %s", message)
         except ValidationError as err:
             logger.exception("Failed to parse message")
             response = Response("Could not parse message", status_code=400)
@@ -128,11 +167,49 @@ class CustomSseWrapper(SseServerTransport):
         # Pass the ASGI scope for framework-agnostic access to request data
         metadata = ServerMessageMetadata(request_context=request)
         session_message = SessionMessage(message, metadata=metadata)
-        logger.debug(f"Sending session message to writer: {session_message}")
+        if debug_enabled:
+            logger.debug("Sending session message to writer: %s", session_message)
         response = Response("Accepted", status_code=202)
         await response(scope, receive, send)
         await writer.send(session_message)
     
+    def _start_repository_sync(self, username: str, repo: str, branch: str) -> str:
+        """
+        启动用户的异步仓库同步；同一用户的同一仓库分支已有同步任务在进行时直接复用，
+        仓库或分支变化后总是启动新的同步
+        
+        Args:
+            username: 用户名
+            repo: 仓库地址
+            branch: 分支名
+            
+        Returns:
+            str: 任务ID
+        """
+        key = (username, repo, branch)
+        task_id = self._inflight_syncs.get(key)
+        if task_id:
+            task = self.user_manager.get_sync_task_status(task_id)
+            if task and task.status in (AsyncOperationStatus.PENDING, AsyncOperationStatus.RUNNING):
+                logger.debug("用户 %s 的仓库 %s@%s 同步任务 %s 仍在进行，跳过重复启动",
+                             username, repo, branch, task_id)
+                return task_id
+        
+        task_id = self.user_manager.sync_user_repository_async(
+            username, callback=partial(self._on_sync_finished, key))
+        self._inflight_syncs[key] = task_id
+        logger.info(f"用户 {username} 的异步仓库同步已启动，任务ID: {task_id}")
+        return task_id
+    
+    def _on_sync_finished(self, key: Tuple[str, str, str], task) -> None:
+        """同步任务结束时移除对应的进行中记录"""
+        if self._inflight_syncs.get(key) == task.task_id:
+            del self._inflight_syncs[key]
+    
+    async def aclose(self) -> None:
+        """关闭时写入尚未落盘的用户数据"""
+        await self.user_manager.aclose()
+    
     def get_user_headers(self, username: str) -> Dict[str, Any]:
         """
         获取指定用户的 headers 信息
@@ -155,7 +232,8 @@ class CustomSseWrapper(SseServerTransport):
         Returns:
             Dict[str, Dict[str, Any]]: 所有用户的 headers 信息
         """
-        all_users = self.user_manager.get_all_users()
+        # 遍历期间用户可能在工作线程中被更新，这里取快照
+        all_users = self.user_manager.get_all_users(snapshot=True)
         return {username: user.to_dict() for username, user in all_users.items()}
     
     def delete_user_headers(self, username: str) -> bool:
@@ -253,6 +331,27 @@ class CustomSseWrapper(SseServerTransport):
         """
         return self.user_manager.sync_all_users_repositories()
     
+    async def sync_all_repositories_async(self, concurrency: int = 8) -> Dict[str, Tuple[bool, str, Path]]:
+        """
+        并发同步所有用户的 GitLab 仓库，不阻塞事件循环
+        
+        Args:
+            concurrency: 同时进行的同步数量上限，默认8
+            
+        Returns:
+            Dict[str, Tuple[bool, str, Path]]: 每个用户的同步结果
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        async def sync_one(username: str) -> Tuple[str, Tuple[bool, str, Path]]:
+            async with semaphore:
+                result = await asyncio.to_thread(self.user_manager.sync_user_repository, username)
+                return username, result
+        
+        usernames = list(self.user_manager.get_all_users())
+        results = await asyncio.gather(*(sync_one(username) for username in usernames))
+        return dict(results)
+    
     def get_user_repository_info(self, username: str) -> Dict[str, Any]:
         """
         获取用户仓库信息
@@ -2,19 +2,94 @@
 用户管理模块 - 用于管理和持久化用户的 headers 信息
 """
 
-import json
+import asyncio
+import atexit
 import logging
 import os
+import sys
+import threading
+import time
+import weakref
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
-from typing import Dict, Any, Optional, List, Tuple
-from dataclasses import dataclass, asdict
+from typing import Dict, Any, Iterator, Optional, List, Mapping, Set, Tuple
+from functools import lru_cache
+from dataclasses import dataclass, field
 from pathlib import Path
+from types import MappingProxyType
 
-from .gitlab_puller import GitLabPuller
+from . import json_io
+from .gitlab_puller import GitLabPuller, GitLabRepoInfo
 
 logger = logging.getLogger("user-manager")
 
-@dataclass
+# 参与指纹计算的字段（不含用户名和时间戳），用于判断 headers 是否发生实质变化
+_FINGERPRINT_FIELDS = ('git_token', 'repo', 'branch', 'sync', 'force_clean')
+
+# 变更日志超过该大小（字节）时合并进快照，限制启动时的回放开销
+_MAX_JOURNAL_BYTES = 1024 * 1024
+
+# 存活的 UserManager 实例，进程退出时统一写盘；弱引用不会延长实例的生命周期
+_LIVE_MANAGERS: 'weakref.WeakSet[UserManager]' = weakref.WeakSet()
+
+
+@atexit.register
+def _flush_live_managers() -> None:
+    """进程退出前写入所有存活用户管理器尚未落盘的变更"""
+    for manager in list(_LIVE_MANAGERS):
+        manager.flush()
+
+
+def _iter_journal(journal_path: str) -> Iterator[Tuple[Dict[str, Any], int]]:
+    """按顺序读取变更日志记录及其所占字节数，跳过写入中断导致的残缺行"""
+    with open(journal_path, 'rb') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                record = json_io.loads(line)
+            except ValueError:
+                # 写入中断导致的残缺行，跳过
+                logger.warning(f"跳过无法解析的变更日志记录: {journal_path}")
+                continue
+            yield record, len(line)
+
+
+def load_user_records(storage_file: str = "./user_headers.json") -> Dict[str, Dict[str, Any]]:
+    """
+    只读加载用户数据：读取快照并回放变更日志
+    
+    快照只在合并变更日志时更新，直接读取快照文件会漏掉之后的变更；
+    不需要完整 UserManager 的读取方应使用本函数。
+    
+    Args:
+        storage_file: 存储文件路径
+        
+    Returns:
+        Dict[str, Dict[str, Any]]: 用户名到 headers 字典的映射，顺序与 UserManager 一致
+    """
+    storage_path = Path(storage_file)
+    users: Dict[str, Dict[str, Any]] = {}
+    if storage_path.exists():
+        users.update(json_io.iter_object_items(storage_path))
+    journal_path = storage_path.with_suffix('.log')
+    if journal_path.exists():
+        for record, _ in _iter_journal(os.fspath(journal_path)):
+            if record.get('op') == 'put':
+                users[record['user']['username']] = record['user']
+            elif record.get('op') == 'del':
+                users.pop(record.get('username'), None)
+    return users
+
+
+@lru_cache(maxsize=1024)
+def _repo_name_of(repo_url: str) -> str:
+    """解析仓库 URL 得到仓库名，按 URL 缓存解析结果"""
+    return GitLabRepoInfo(username='', git_token='', repo_url=repo_url).repo_name
+
+
+@dataclass(slots=True)
 class UserHeaders:
     """用户 headers 数据模型"""
     username: str
@@ -25,69 +100,341 @@ class UserHeaders:
     force_clean: bool = False
     created_at: str = ""
     updated_at: str = ""
+    # updated_at 解析结果缓存：(解析时的 updated_at, 对应的时间戳)，仅驻留内存
+    _updated_at_cache: Tuple[str, float] = field(default=('', 0.0), init=False, repr=False, compare=False)
+    # _serialized_dict 结果缓存，touch 时置空
+    _cached_dict: Optional[Dict[str, Any]] = field(default=None, init=False, repr=False, compare=False)
     
     def __post_init__(self):
-        """初始化后处理，设置时间戳"""
-        current_time = datetime.now().isoformat()
+        """初始化后处理，驻留重复度高的字符串并补齐缺失的时间戳"""
+        # 多个用户常共用同一仓库和分支，驻留后共享同一字符串对象
+        self.username = sys.intern(self.username)
+        self.repo = sys.intern(self.repo)
+        self.branch = sys.intern(self.branch)
+        
+        # 从文件加载时两个时间戳都已存在，无需获取当前时间
+        if self.created_at and self.updated_at:
+            return
+        now = datetime.now()
+        current_time = now.isoformat()
         if not self.created_at:
             self.created_at = current_time
-        self.updated_at = current_time
+        if not self.updated_at:
+            self.updated_at = current_time
+            self._updated_at_cache = (current_time, now.timestamp())
+    
+    def touch(self) -> None:
+        """刷新更新时间"""
+        now = datetime.now()
+        self.updated_at = now.isoformat()
+        self._updated_at_cache = (self.updated_at, now.timestamp())
+        self._cached_dict = None
+    
+    @property
+    def updated_at_ts(self) -> float:
+        """updated_at 对应的时间戳（秒），按 updated_at 字符串缓存解析结果；格式有误时返回 0"""
+        source, timestamp = self._updated_at_cache
+        if source is not self.updated_at:
+            try:
+                timestamp = datetime.fromisoformat(self.updated_at).timestamp()
+            except ValueError:
+                timestamp = 0.0
+            self._updated_at_cache = (self.updated_at, timestamp)
+        return timestamp
+    
+    def updated_from(self, data: Dict[str, Any]) -> 'UserHeaders':
+        """
+        用 headers 字典生成更新后的新实例，保留创建时间并刷新更新时间，缺失字段按默认值处理
+        
+        不修改当前实例，已持有它的读取方看到的始终是完整的一版数据。
+        
+        Args:
+            data: headers 字典
+            
+        Returns:
+            UserHeaders: 更新后的新实例
+        """
+        fields = UserHeaders.__dataclass_fields__
+        return UserHeaders(
+            username=self.username,
+            git_token=data.get('git_token', fields['git_token'].default),
+            repo=data.get('repo', fields['repo'].default),
+            branch=data.get('branch', fields['branch'].default),
+            sync=data.get('sync', fields['sync'].default),
+            force_clean=data.get('force_clean', fields['force_clean'].default),
+            created_at=self.created_at,
+        )
     
     def to_dict(self) -> Dict[str, Any]:
-        """转换为字典格式"""
-        return asdict(self)
+        """转换为字典格式，每次新建，调用方可自由修改；不读写缓存，无需持有锁"""
+        return {
+            'username': self.username,
+            'git_token': self.git_token,
+            'repo': self.repo,
+            'branch': self.branch,
+            'sync': self.sync,
+            'force_clean': self.force_clean,
+            'created_at': self.created_at,
+            'updated_at': self.updated_at,
+        }
+    
+    def _serialized_dict(self) -> Dict[str, Any]:
+        """
+        获取用于序列化的字典，结果缓存并在多次调用间共享，只可读取不可修改
+        
+        调用方需持有 UserManager._users_lock，避免与并发更新交错而缓存到不完整的内容。
+        """
+        data = self._cached_dict
+        if data is None:
+            data = self.to_dict()
+            self._cached_dict = data
+        return data
     
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> 'UserHeaders':
         """从字典创建实例"""
         return cls(**data)
+    
+    def fingerprint(self) -> Tuple:
+        """获取 headers 内容指纹"""
+        return tuple(getattr(self, name) for name in _FINGERPRINT_FIELDS)
+    
+    @classmethod
+    def fingerprint_of(cls, data: Dict[str, Any]) -> Tuple:
+        """获取 headers 字典的内容指纹，缺失字段按默认值计算"""
+        fields = cls.__dataclass_fields__
+        return tuple(data.get(name, fields[name].default) for name in _FINGERPRINT_FIELDS)
 
 
 class UserManager:
     """用户管理类，负责用户 headers 信息的持久化和管理"""
     
-    def __init__(self, storage_file: str = "./user_headers.json", workspace_root: str = "./workspace"):
+    def __init__(self, storage_file: str = "./user_headers.json", workspace_root: str = "./workspace",
+                 flush_interval: float = 1.0, indent: Optional[bool] = None, repo_list_ttl: float = 5.0):
         """
         初始化用户管理器
         
         Args:
             storage_file: 存储文件路径，默认为 user_headers.json
             workspace_root: 工作空间根目录，默认为 ./workspace
+            flush_interval: 用户更新合并写盘的间隔（秒），小于等于 0 时每次更新立即写盘
+            indent: 存储文件是否缩进排版；默认读取环境变量 USER_HEADERS_INDENT（默认开启），
+                生产环境关闭可减小文件体积并加快序列化
+            repo_list_ttl: 用户仓库列表的缓存有效期（秒），小于等于 0 时不缓存
         """
         self.storage_file = Path(storage_file)
+        if indent is None:
+            indent = os.getenv('USER_HEADERS_INDENT', 'true').lower() in ('true', '1', 'yes')
+        self.indent = indent
+        # 追加写入的变更日志（每行一条 put/del 记录），定期合并进 storage_file
+        self.journal_file = self.storage_file.with_suffix('.log')
         self._users: Dict[str, UserHeaders] = {}
+        # 二级索引：仓库 -> 使用该仓库的用户名集合
+        self._repo_index: Dict[str, Set[str]] = defaultdict(set)
         self.gitlab_puller = GitLabPuller(workspace_root)
+        
+        # 用户仓库列表缓存：用户名 -> (缓存时间, 仓库列表)
+        self.repo_list_ttl = repo_list_ttl
+        self._repo_list_cache: Dict[str, Tuple[float, List[Dict[str, Any]]]] = {}
+        
+        # 延迟写盘状态：更新只修改内存数据，由后台定时器合并写入
+        self.flush_interval = flush_interval
+        self._changed_users: Set[str] = set()
+        self._needs_compact = False
+        self._journal_entries = 0
+        self._journal_bytes = 0
+        # 最近一次写入快照内容的哈希，内容未变化时跳过重写
+        self._last_saved_hash: Optional[int] = None
+        self._flush_timer: Optional[threading.Timer] = None
+        self._flush_lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        # 保护 _users 的并发修改（add_or_update_user 可能在工作线程中执行）
+        self._users_lock = threading.Lock()
+        
         self._load_users()
+        # 进程退出前写入尚未落盘的变更（由模块级退出钩子统一处理）
+        _LIVE_MANAGERS.add(self)
     
     def _load_users(self) -> None:
-        """从文件加载用户数据"""
+        """从文件加载用户数据，并回放变更日志"""
         try:
-            if self.storage_file.exists():
-                with open(self.storage_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    for username, user_data in data.items():
-                        self._users[username] = UserHeaders.from_dict(user_data)
-                logger.info(f"已加载 {len(self._users)} 个用户的数据")
-            else:
+            # 启动路径上直接使用字符串路径，避免 pathlib 的额外开销
+            storage_path = os.fspath(self.storage_file)
+            if os.path.exists(storage_path):
+                # 逐个用户流式读取，避免同时持有完整的解析结果
+                for count, (username, user_data) in enumerate(json_io.iter_object_items(storage_path), 1):
+                    self._set_user(username, UserHeaders.from_dict(user_data))
+                    if count % 10000 == 0:
+                        logger.info(f"已读取 {count} 个用户的数据...")
+            if not self._replay_journal() and not self._users:
                 logger.info("存储文件不存在，创建新的用户数据存储")
+                return
+            logger.info(f"已加载 {len(self._users)} 个用户的数据")
         except Exception as e:
             logger.error(f"加载用户数据失败: {e}")
             self._users = {}
+            self._repo_index.clear()
+    
+    def _set_user(self, username: str, user: UserHeaders) -> None:
+        """写入用户并维护仓库索引（调用方需持有 _users_lock 或处于初始化阶段）"""
+        old_user = self._users.get(username)
+        if old_user is not None and old_user.repo != user.repo:
+            self._unindex_repo(old_user.repo, username)
+        self._users[username] = user
+        self._repo_index[user.repo].add(username)
+    
+    def _remove_user(self, username: str) -> Optional[UserHeaders]:
+        """移除用户并维护仓库索引（调用方需持有 _users_lock 或处于初始化阶段）"""
+        user = self._users.pop(username, None)
+        if user is not None:
+            self._unindex_repo(user.repo, username)
+        return user
+    
+    def _unindex_repo(self, repo: str, username: str) -> None:
+        """从仓库索引中移除用户，空集合一并删除"""
+        usernames = self._repo_index.get(repo)
+        if usernames is not None:
+            usernames.discard(username)
+            if not usernames:
+                del self._repo_index[repo]
+    
+    def _replay_journal(self) -> bool:
+        """
+        按顺序回放变更日志中的 put/del 记录
+        
+        Returns:
+            bool: 变更日志存在返回 True，否则返回 False
+        """
+        journal_path = os.fspath(self.journal_file)
+        if not os.path.exists(journal_path):
+            return False
+        
+        for record, size in _iter_journal(journal_path):
+            if record.get('op') == 'put':
+                user = UserHeaders.from_dict(record['user'])
+                self._set_user(user.username, user)
+            elif record.get('op') == 'del':
+                self._remove_user(record.get('username'))
+            self._journal_entries += 1
+            self._journal_bytes += size
+        return True
     
     def _save_users(self) -> None:
-        """保存用户数据到文件"""
-        try:
-            # 确保目录存在
-            self.storage_file.parent.mkdir(parents=True, exist_ok=True)
-            
-            # 转换为可序列化的格式
-            data = {username: user.to_dict() for username, user in self._users.items()}
+        """保存完整用户数据到文件（先写临时文件再原子替换），并清空变更日志"""
+        with self._save_lock:
+            try:
+                # 确保目录存在
+                self.storage_file.parent.mkdir(parents=True, exist_ok=True)
+                
+                # 在锁内转换为可序列化的格式，避免与其他线程的更新交错
+                with self._users_lock:
+                    data = {username: user._serialized_dict() for username, user in self._users.items()}
+                payload = json_io.dumps(data, indent=self.indent)
+                payload_hash = hash(payload)
+                
+                if payload_hash == self._last_saved_hash and self.storage_file.exists():
+                    logger.debug("用户数据未变化，跳过重写存储文件")
+                else:
+                    tmp_file = self.storage_file.with_name(self.storage_file.name + '.tmp')
+                    # 临时文件落盘后再原子替换，崩溃时不会留下写了一半的存储文件
+                    json_io.write_file(tmp_file, payload, fsync=True)
+                    os.replace(tmp_file, self.storage_file)
+                    self._last_saved_hash = payload_hash
+                
+                # 快照已包含日志中的全部变更
+                if self.journal_file.exists():
+                    self.journal_file.unlink()
+                self._journal_entries = 0
+                self._journal_bytes = 0
+                logger.debug(f"用户数据已保存到 {self.storage_file}")
+            except Exception as e:
+                logger.error(f"保存用户数据失败: {e}")
+    
+    def _append_journal(self, usernames: Set[str]) -> None:
+        """把指定用户的当前状态追加写入变更日志"""
+        with self._save_lock:
+            try:
+                with self._users_lock:
+                    records = []
+                    for username in usernames:
+                        user = self._users.get(username)
+                        if user is None:
+                            records.append({'op': 'del', 'username': username})
+                        else:
+                            records.append({'op': 'put', 'user': user._serialized_dict()})
+                payload = b''.join(json_io.dumps(record, indent=False) + b'\n' for record in records)
+                
+                self.journal_file.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.journal_file, 'ab') as f:
+                    f.write(payload)
+                self._journal_entries += len(records)
+                self._journal_bytes += len(payload)
+                logger.debug(f"已追加 {len(records)} 条用户变更到 {self.journal_file}")
+            except Exception as e:
+                logger.error(f"写入用户变更日志失败: {e}")
+    
+    def _should_compact(self, pending: int) -> bool:
+        """变更日志条数超过用户数的 4 倍（至少 100 条）或日志大小超过上限时合并进快照"""
+        return (self._journal_entries + pending > max(4 * len(self._users), 100)
+                or self._journal_bytes >= _MAX_JOURNAL_BYTES)
+    
+    def _schedule_save(self, username: Optional[str] = None) -> None:
+        """
+        标记数据已变更，并在 flush_interval 秒后合并写盘
+        
+        Args:
+            username: 发生变更的用户名；为 None 时表示批量变更，写盘时重写完整快照
+        """
+        with self._flush_lock:
+            if username is None:
+                self._needs_compact = True
+            else:
+                self._changed_users.add(username)
             
-            with open(self.storage_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
-            logger.debug(f"用户数据已保存到 {self.storage_file}")
-        except Exception as e:
-            logger.error(f"保存用户数据失败: {e}")
+            if self.flush_interval > 0 and self._flush_timer is None:
+                timer = threading.Timer(self.flush_interval, self.flush)
+                timer.daemon = True
+                self._flush_timer = timer
+                timer.start()
+        
+        if self.flush_interval <= 0:
+            self.flush()
+    
+    def _mark_touched(self, username: str) -> None:
+        """记录仅更新时间变化的用户，不单独触发写盘"""
+        with self._flush_lock:
+            self._changed_users.add(username)
+    
+    def flush(self) -> None:
+        """立即写入尚未落盘的用户数据"""
+        with self._flush_lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            changed_users, self._changed_users = self._changed_users, set()
+            needs_compact, self._needs_compact = self._needs_compact, False
+        
+        if not (changed_users or needs_compact):
+            return
+        # 快照文件还不存在时先写出完整快照，之后的变更再追加到日志
+        if needs_compact or not self.storage_file.exists() or self._should_compact(len(changed_users)):
+            self._save_users()
+        else:
+            self._append_journal(changed_users)
+    
+    def compact(self) -> None:
+        """把变更日志合并进快照文件"""
+        with self._flush_lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            self._changed_users.clear()
+            self._needs_compact = False
+        self._save_users()
+    
+    async def aclose(self) -> None:
+        """在线程中写入尚未落盘的变更，供服务关闭时调用，避免阻塞事件循环"""
+        await asyncio.to_thread(self.flush)
     
     def add_or_update_user(self, headers_data: Dict[str, Any]) -> UserHeaders:
         """
@@ -103,19 +450,32 @@ class UserManager:
         if not username:
             raise ValueError("用户名不能为空")
         
-        # 如果用户已存在，更新信息；否则创建新用户
-        if username in self._users:
-            existing_user = self._users[username]
-            # 保留创建时间，更新其他信息
-            headers_data['created_at'] = existing_user.created_at
-            user = UserHeaders.from_dict(headers_data)
-            logger.info(f"更新用户 {username} 的信息")
-        else:
-            user = UserHeaders.from_dict(headers_data)
-            logger.info(f"添加新用户 {username}")
-        
-        self._users[username] = user
-        self._save_users()
+        with self._users_lock:
+            existing_user = self._users.get(username)
+            if existing_user is not None and existing_user.fingerprint() == UserHeaders.fingerprint_of(headers_data):
+                # headers 未变化：只在内存中刷新更新时间，留待下次写盘时一并持久化
+                existing_user.touch()
+                touched = True
+            else:
+                touched = False
+        if touched:
+            self._mark_touched(username)
+            return existing_user
+        
+        with self._users_lock:
+            existing_user = self._users.get(username)
+            if existing_user is not None:
+                # 构造新实例整体替换，不原地改写可能正被其他线程读取的对象
+                user = existing_user.updated_from(headers_data)
+                self._set_user(username, user)
+                logger.info(f"更新用户 {username} 的信息")
+            else:
+                # 更新时间总是取当前时间，忽略传入数据中的旧值
+                headers_data.pop('updated_at', None)
+                user = UserHeaders.from_dict(headers_data)
+                self._set_user(username, user)
+                logger.info(f"添加新用户 {username}")
+        self._schedule_save(username)
         return user
     
     def get_user(self, username: str) -> Optional[UserHeaders]:
@@ -130,14 +490,23 @@ class UserManager:
         """
         return self._users.get(username)
     
-    def get_all_users(self) -> Dict[str, UserHeaders]:
+    def get_all_users(self, snapshot: bool = False) -> Mapping[str, UserHeaders]:
         """
         获取所有用户信息
         
+        默认返回内部用户字典的只读视图（不复制），会随后续更新变化；
+        需要在并发更新期间遍历或长期持有时请使用 snapshot=True。
+        
+        Args:
+            snapshot: 是否返回独立的字典副本
+            
         Returns:
-            Dict[str, UserHeaders]: 所有用户的字典
+            Mapping[str, UserHeaders]: 所有用户的只读视图或字典副本
         """
-        return self._users.copy()
+        if snapshot:
+            with self._users_lock:
+                return self._users.copy()
+        return MappingProxyType(self._users)
     
     def delete_user(self, username: str) -> bool:
         """
@@ -149,9 +518,10 @@ class UserManager:
         Returns:
             bool: 删除成功返回 True，用户不存在返回 False
         """
-        if username in self._users:
-            del self._users[username]
-            self._save_users()
+        with self._users_lock:
+            removed = self._remove_user(username) is not None
+        if removed:
+            self._schedule_save(username)
             logger.info(f"删除用户 {username}")
             return True
         return False
@@ -187,7 +557,8 @@ class UserManager:
         Returns:
             List[UserHeaders]: 使用该仓库的用户列表
         """
-        return [user for user in self._users.values() if user.repo == repo]
+        with self._users_lock:
+            return [self._users[username] for username in self._repo_index.get(repo, ())]
     
     def cleanup_old_users(self, days: int = 30) -> int:
         """
@@ -199,25 +570,17 @@ class UserManager:
         Returns:
             int: 清理的用户数量
         """
-        from datetime import datetime, timedelta
-        
-        cutoff_date = datetime.now() - timedelta(days=days)
-        users_to_remove = []
+        cutoff_ts = time.time() - days * 86400
         
-        for username, user in self._users.items():
-            try:
-                updated_at = datetime.fromisoformat(user.updated_at)
-                if updated_at < cutoff_date:
-                    users_to_remove.append(username)
-            except ValueError:
-                # 如果时间格式有问题，也标记为需要清理
-                users_to_remove.append(username)
-        
-        for username in users_to_remove:
-            del self._users[username]
+        with self._users_lock:
+            users_to_remove = [username for username, user in self._users.items()
+                               if user.updated_at_ts < cutoff_ts]
+            for username in users_to_remove:
+                self._remove_user(username)
         
         if users_to_remove:
-            self._save_users()
+            # 批量删除后直接重写快照，顺带合并变更日志
+            self._schedule_save()
             logger.info(f"清理了 {len(users_to_remove)} 个长时间未更新的用户")
         
         return len(users_to_remove)
@@ -236,10 +599,10 @@ class UserManager:
             export_path = Path(export_file)
             export_path.parent.mkdir(parents=True, exist_ok=True)
             
-            data = {username: user.to_dict() for username, user in self._users.items()}
-            
-            with open(export_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            # 在锁内取出各用户的字典，写文件时不持有锁
+            with self._users_lock:
+                records = [(username, user._serialized_dict()) for username, user in self._users.items()]
+            json_io.dump_object_items(export_path, records)
             
             logger.info(f"用户数据已导出到 {export_file}")
             return True
@@ -259,28 +622,42 @@ class UserManager:
             bool: 导入成功返回 True，否则返回 False
         """
         try:
-            import_path = Path(import_file)
-            if not import_path.exists():
+            import_path = os.fspath(import_file)
+            if not os.path.exists(import_path):
                 logger.error(f"导入文件不存在: {import_file}")
                 return False
             
-            with open(import_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            
-            if not merge:
-                self._users.clear()
-            
-            imported_count = 0
-            for username, user_data in data.items():
+            # 先在锁外完整读取导入文件，文件残缺或格式不对时直接失败，不影响现有数据
+            imported: Dict[str, UserHeaders] = {}
+            # 逐个用户流式读取，避免一次性载入整个导入文件
+            for username, user_data in json_io.iter_object_items(import_path):
                 try:
-                    user = UserHeaders.from_dict(user_data)
-                    self._users[username] = user
-                    imported_count += 1
+                    imported[username] = UserHeaders.from_dict(user_data)
                 except Exception as e:
                     logger.warning(f"导入用户 {username} 失败: {e}")
-            
-            self._save_users()
-            logger.info(f"成功导入 {imported_count} 个用户的数据")
+            imported_count = len(imported)
+            
+            changed_count = 0
+            removed_count = 0
+            with self._users_lock:
+                if not merge:
+                    # 只移除导入数据中没有的用户，其余用户直接覆盖，过程中不会出现空数据
+                    for username in [name for name in self._users if name not in imported]:
+                        self._remove_user(username)
+                        removed_count += 1
+                
+                for username, user in imported.items():
+                    existing_user = self._users.get(username)
+                    if existing_user is not None and existing_user.fingerprint() == user.fingerprint():
+                        # 内容相同的用户保留现有数据
+                        continue
+                    self._set_user(username, user)
+                    changed_count += 1
+            
+            # 没有任何变化时无需重写存储文件
+            if changed_count or removed_count:
+                self._schedule_save()
+            logger.info(f"成功导入 {imported_count} 个用户的数据，其中 {changed_count} 个有变化")
             return True
         except Exception as e:
             logger.error(f"导入用户数据失败: {e}")
@@ -304,6 +681,7 @@ class UserManager:
             # 将用户数据转换为字典格式
             user_headers = user.to_dict()
             success, message, local_path = self.gitlab_puller.sync_repository(user_headers)
+            self.clear_repo_cache(username)
             
             if success:
                 logger.info(f"用户 {username} 的仓库同步成功: {message}")
@@ -377,23 +755,31 @@ class UserManager:
         """
         return self.gitlab_puller.cancel_task(task_id)
     
-    def sync_all_users_repositories(self) -> Dict[str, Tuple[bool, str, Path]]:
+    def sync_all_users_repositories(self, max_parallel: int = 8) -> Dict[str, Tuple[bool, str, Path]]:
         """
-        同步所有用户的 GitLab 仓库
+        并行同步所有用户的 GitLab 仓库
         
+        Args:
+            max_parallel: 同时进行的同步数量上限，默认8
+            
         Returns:
             Dict[str, Tuple[bool, str, Path]]: 每个用户的同步结果
         """
         results = {}
-        
-        for username in self._users.keys():
-            try:
-                success, message, local_path = self.sync_user_repository(username)
-                results[username] = (success, message, local_path)
-            except Exception as e:
-                error_msg = f"同步用户 {username} 时发生错误: {str(e)}"
-                logger.error(error_msg)
-                results[username] = (False, error_msg, Path())
+        usernames = list(self._users)
+        if not usernames:
+            return results
+        
+        with ThreadPoolExecutor(max_workers=min(max_parallel, len(usernames))) as executor:
+            futures = {executor.submit(self.sync_user_repository, username): username for username in usernames}
+            for future in as_completed(futures):
+                username = futures[future]
+                try:
+                    results[username] = future.result()
+                except Exception as e:
+                    error_msg = f"同步用户 {username} 时发生错误: {str(e)}"
+                    logger.error(error_msg)
+                    results[username] = (False, error_msg, Path())
         
         return results
     
@@ -412,18 +798,8 @@ class UserManager:
             return {}
         
         try:
-            from .gitlab_puller import GitLabRepoInfo
-            
-            # 创建仓库信息对象
-            repo_info = GitLabRepoInfo(
-                username=user.username,
-                git_token=user.git_token,
-                repo_url=user.repo,
-                branch=user.branch
-            )
-            
-            repo_uri = repo_info.get_repo_uri()
-            return self.gitlab_puller.get_repository_info(username, repo_info.repo_name)
+            # 仓库名只取决于仓库 URL，解析结果按 URL 缓存，用户更新 repo 后自然命中新的条目
+            return self.gitlab_puller.get_repository_info(username, _repo_name_of(user.repo))
         except Exception as e:
             logger.error(f"获取用户 {username} 仓库信息失败: {e}")
             return {}
@@ -438,11 +814,31 @@ class UserManager:
         Returns:
             List[Dict[str, Any]]: 仓库列表
         """
+        cached = self._repo_list_cache.get(username)
+        if cached is not None and time.monotonic() - cached[0] < self.repo_list_ttl:
+            return list(cached[1])
+        
         try:
-            return self.gitlab_puller.list_user_repositories(username)
+            repositories = self.gitlab_puller.list_user_repositories(username)
         except Exception as e:
             logger.error(f"列出用户 {username} 仓库失败: {e}")
             return []
+        
+        if self.repo_list_ttl > 0:
+            self._repo_list_cache[username] = (time.monotonic(), repositories)
+        return list(repositories)
+    
+    def clear_repo_cache(self, username: Optional[str] = None) -> None:
+        """
+        清除仓库列表缓存
+        
+        Args:
+            username: 用户名，不提供则清除全部缓存
+        """
+        if username is None:
+            self._repo_list_cache.clear()
+        else:
+            self._repo_list_cache.pop(username, None)
     
     def cleanup_user_repositories(self, username: str, keep_recent: int = 5) -> int:
         """
@@ -457,6 +853,7 @@ class UserManager:
         """
         try:
             cleaned_count = self.gitlab_puller.cleanup_user_repositories(username, keep_recent)
+            self.clear_repo_cache(username)
             logger.info(f"为用户 {username} 清理了 {cleaned_count} 个旧仓库")
             return cleaned_count
         except Exception as e:
@@ -504,8 +901,16 @@ class UserManager:
             'users_summary': []
         }
         
-        for username, user in self._users.items():
-            user_repos = self.list_user_repositories(username)
+        users = list(self._users.items())
+        usernames = [username for username, _ in users]
+        # 各用户的仓库目录扫描相互独立，并行执行
+        if usernames:
+            with ThreadPoolExecutor(max_workers=min(16, len(usernames))) as executor:
+                repo_lists = list(executor.map(self.list_user_repositories, usernames))
+        else:
+            repo_lists = []
+        
+        for (username, user), user_repos in zip(users, repo_lists):
             user_info = {
                 'username': username,
                 'repo_url': user.repo,
@@ -521,4 +926,30 @@ class UserManager:
             
             summary['users_summary'].append(user_info)
         
-        return summary
\ No newline at end of file
+        return summary
+
+
+# 进程内共享的 UserManager 实例，按 (存储文件, 工作空间) 区分
+_SHARED_MANAGERS: Dict[Tuple[str, str], UserManager] = {}
+_SHARED_MANAGERS_LOCK = threading.Lock()
+
+
+def get_shared_user_manager(storage_file: str = "./user_headers.json",
+                            workspace_root: str = "./workspace") -> UserManager:
+    """
+    获取共享的用户管理器，相同存储文件和工作空间只加载一次
+    
+    Args:
+        storage_file: 存储文件路径
+        workspace_root: 工作空间根目录
+        
+    Returns:
+        UserManager: 用户管理器实例
+    """
+    key = (str(Path(storage_file).resolve()), str(Path(workspace_root).resolve()))
+    with _SHARED_MANAGERS_LOCK:
+        manager = _SHARED_MANAGERS.get(key)
+        if manager is None:
+            manager = UserManager(storage_file, workspace_root)
+            _SHARED_MANAGERS[key] = manager
+        return manager